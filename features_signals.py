@@ -12,25 +12,37 @@ Outputs
 
 Design
 ------
-- Keep memory footprint small: select necessary columns; sparse TF-IDF;
-  dimensionality reduction via TruncatedSVD (linear, works with sparse).
+- Keep memory footprint small: select necessary columns; sparse TF-IDF over
+  hashed terms (no vocabulary); dimensionality reduction via randomized
+  truncated SVD (linear, works with sparse), computing only the components
+  the composite signal consumes.
 - No external APIs. All open-source libraries only.
 """
 
 from __future__ import annotations
 import argparse
+import concurrent.futures as cf
 import logging
+from datetime import date
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import List, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import TruncatedSVD
-from sklearn.preprocessing import StandardScaler
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.utils.extmath import randomized_svd, svd_flip
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 
+try:  # optional: JIT bootstrap; the vectorized NumPy path is used without it
+    import numba
+except ImportError:
+    numba = None
+
 
 BULL_WORDS = {
     "buy","bull","long","breakout","rally","support","up","green","accumulate","entry"
@@ -41,6 +53,21 @@ BEAR_WORDS = {
 URGENCY_WORDS = {
     "now","today","alert","immediate","intraday","urgent","live"
 }
+# Token -> lexicon bitmask (bull=0b001, bear=0b010, urgency=0b100), as a sorted
+# word array plus aligned int8 codes so scoring is one lookup + gather per token
+LEX_BULL, LEX_BEAR, LEX_URGENCY = 0b001, 0b010, 0b100
+LEX = {
+    w: (LEX_BULL if w in BULL_WORDS else 0) | (LEX_BEAR if w in BEAR_WORDS else 0)
+       | (LEX_URGENCY if w in URGENCY_WORDS else 0)
+    for w in BULL_WORDS | BEAR_WORDS | URGENCY_WORDS
+}
+LEX_WORDS = pa.array(sorted(LEX), type=pa.string())
+LEX_CODES = np.array([LEX[w] for w in LEX_WORDS.to_pylist()], dtype=np.int8)
+
+PARQUET_ROW_GROUP_SIZE = 262_144  # rows
+PARQUET_PAGE_SIZE = 1 << 20  # bytes
+# Layout written by ingest_clean_store.py: <dataset>/date=YYYY-MM-DD/*.parquet
+DATE_PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
 
 
 def setup_logging(verbosity: int) -> None:
@@ -55,143 +82,321 @@ def setup_logging(verbosity: int) -> None:
 logger = logging.getLogger("features")
 
 
-def load_minimal(parquet_path: Path) -> pd.DataFrame:
+def load_minimal(parquet_path: Path, start_date: date | None = None, end_date: date | None = None) -> pd.DataFrame:
+    """
+    Read the columns features need from the ingest dataset (or a single file).
+
+    Date bounds (inclusive) are pushed down to Arrow, so only the matching
+    date=... partitions of a hive-partitioned dataset are opened.
+    """
     cols = ["uid","timestamp","content","likes","retweets","replies","_hashtags_list","hashtag_primary","username"]
-    df = pd.read_parquet(parquet_path, columns=cols)
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    partitioning = DATE_PARTITIONING if Path(parquet_path).is_dir() else None
+    dataset = ds.dataset(parquet_path, format="parquet", partitioning=partitioning)
+    flt = None
+    if start_date is not None:
+        flt = ds.field("date") >= pa.scalar(start_date, pa.date32())
+    if end_date is not None:
+        upper = ds.field("date") <= pa.scalar(end_date, pa.date32())
+        flt = upper if flt is None else flt & upper
+    df = dataset.to_table(columns=cols, filter=flt).to_pandas()
+    # Ingest stores timestamp[ns, UTC], which converts to datetime64[ns, UTC]
+    # as is; only other inputs (e.g. string timestamps) need parsing
+    if not isinstance(df["timestamp"].dtype, pd.DatetimeTZDtype):
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
     df = df.dropna(subset=["timestamp","content"])
     return df
 
 
-def lexicon_polarity(texts: List[str]) -> np.ndarray:
-    """Simple polarity score = (bull - bear) / tokens (case-insensitive)."""
-    scores = np.empty(len(texts), dtype=float)
-    for i, t in enumerate(texts):
-        toks = [w.lower() for w in t.split()]
-        if not toks:
-            scores[i] = 0.0
-            continue
-        bull = sum(w in BULL_WORDS for w in toks)
-        bear = sum(w in BEAR_WORDS for w in toks)
-        scores[i] = (bull - bear) / max(1, len(toks))
-    return scores
+def lexicon_scores(texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lexical polarity, urgency and token counts in one vectorized pass.
 
+    polarity = (bull - bear) / tokens, urgency = urgent / tokens (case-insensitive).
+    All tweets are lowercased/split with Arrow kernels into one flat token array
+    plus its parent-document index, so the lexicon lookup (a bitmask code per
+    token) and per-document counts are C-level ops instead of a Python loop.
+    """
+    n = len(texts)
+    lists = pc.utf8_split_whitespace(pc.utf8_lower(pa.array(texts, type=pa.string())))
+    tokens = pc.list_flatten(lists)
+    doc = pc.list_parent_indices(lists)
+    keep = pc.not_equal(tokens, "")
+    n_tokens = np.bincount(doc.filter(keep).to_numpy(), minlength=n)
+
+    # One hash lookup per token gives its lexicon code; non-lexicon tokens
+    # (null index) are dropped before the per-document counts.
+    idx = pc.index_in(tokens, value_set=LEX_WORDS)
+    hit = pc.is_valid(idx)
+    codes = LEX_CODES[idx.filter(hit).to_numpy()]
+    doc = doc.filter(hit).to_numpy()
+
+    def count(bit: int) -> np.ndarray:
+        return np.bincount(doc, weights=(codes & bit) != 0, minlength=n)
+
+    denom = np.maximum(1, n_tokens)
+    polarity = (count(LEX_BULL) - count(LEX_BEAR)) / denom
+    urgency = count(LEX_URGENCY) / denom
+    return polarity, urgency, n_tokens
+
+
+def build_tfidf(texts: List[str], n_features: int = 2**14) -> Tuple[sp.csr_matrix, Pipeline]:
+    """
+    Build the sparse (CSR) TF-IDF matrix over unigrams + bigrams.
 
-def urgency_score(texts: List[str]) -> np.ndarray:
-    scores = np.empty(len(texts), dtype=float)
-    for i, t in enumerate(texts):
-        toks = [w.lower() for w in t.split()]
-        u = sum(w in URGENCY_WORDS for w in toks)
-        scores[i] = u / max(1, len(toks))
-    return scores
+    Terms are hashed into `n_features` columns (no vocabulary pass or dict),
+    then IDF-weighted with sublinear term frequencies.
+    """
+    vectorizer = make_pipeline(
+        HashingVectorizer(n_features=n_features, ngram_range=(1,2), token_pattern=r"(?u)\b\w+\b",
+                          alternate_sign=False, norm=None),
+        TfidfTransformer(use_idf=True, sublinear_tf=True),
+    )
+    X = vectorizer.fit_transform(texts)  # sparse
+    return X, vectorizer
 
 
-def build_tfidf_svd(texts: List[str], max_features: int = 5000, n_components: int = 8) -> Tuple[np.ndarray, Dict]:
+def top_svd_component(X: sp.csr_matrix, n_components: int = 1, n_iter: int = 4) -> np.ndarray:
     """
-    Build TF-IDF -> Truncated SVD components.
-    Returns dense array [n_samples, n_components] and fitted artifacts.
+    Leading truncated-SVD components of X as a dense [n_samples, n_components] array.
+
+    Randomized SVD with a few power iterations only needs a handful of sparse
+    products with X and X^T; the composite consumes svd_1, so by default only
+    that component is computed. Signs follow TruncatedSVD (V-based svd_flip).
     """
-    vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=(1,2), token_pattern=r"(?u)\b\w+\b")
-    X = vectorizer.fit_transform(texts)  # sparse
-    svd = TruncatedSVD(n_components=n_components, random_state=42)
-    Z = svd.fit_transform(X)  # dense small matrix
-    artifacts = {"vectorizer": vectorizer, "svd": svd}
-    return Z, artifacts
+    U, s, Vt = randomized_svd(X, n_components=n_components, n_iter=n_iter, flip_sign=False, random_state=42)
+    U, Vt = svd_flip(U, Vt, u_based_decision=False)
+    return U * s
 
 
 def zscore(a: np.ndarray) -> np.ndarray:
-    if a.ndim == 1:
-        a = a[:, None]
-    scaler = StandardScaler()
-    return scaler.fit_transform(a).squeeze()
+    """Standardize a 1-D array (population std, like StandardScaler; constant input -> a - mean)."""
+    a = np.ascontiguousarray(a, dtype=np.float64)
+    m = a.mean()
+    s = a.std()
+    return (a - m) / s if s else a - m
 
 
 def bootstrap_ci(x: np.ndarray, iters: int = 200, alpha: float = 0.05, rng: np.random.Generator | None = None) -> Tuple[float, float]:
-    """Non-parametric bootstrap CI for the mean."""
+    """Non-parametric bootstrap CI for the mean (all resamples drawn as one [iters, n] matrix)."""
     if rng is None:
         rng = np.random.default_rng(42)
     x = np.asarray(x, dtype=float)
     if x.size == 0:
         return (np.nan, np.nan)
-    means = np.empty(iters, dtype=float)
-    n = x.size
-    for i in range(iters):
-        idx = rng.integers(0, n, size=n)
-        means[i] = float(np.mean(x[idx]))
-    lo = np.quantile(means, alpha/2)
-    hi = np.quantile(means, 1 - alpha/2)
+    idx = rng.integers(0, x.size, size=(iters, x.size))
+    means = x[idx].mean(axis=1)
+    lo, hi = np.quantile(means, [alpha/2, 1 - alpha/2])
     return (float(lo), float(hi))
 
 
-def compute_features(df: pd.DataFrame) -> pd.DataFrame:
+def _bootstrap_means(x: np.ndarray, sizes: np.ndarray, iters: int, rng: np.random.Generator, max_elems: int) -> np.ndarray:
+    """[iters, len(sizes)] bootstrap means of back-to-back, non-empty groups of x."""
+    starts = np.cumsum(sizes) - sizes
+    span_start = np.repeat(starts, sizes)
+    span_size = np.repeat(sizes, sizes)
+
+    means = np.empty((iters, sizes.size), dtype=float)
+    block = max(1, max_elems // x.size)
+    for i in range(0, iters, block):
+        b = min(block, iters - i)
+        idx = span_start + rng.integers(0, span_size, size=(b, x.size))
+        means[i:i+b] = np.add.reduceat(x[idx], starts, axis=1) / sizes
+    return means
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _bootstrap_means_jit(x, starts, sizes, iters, seed):
+        """[iters, len(sizes)] bootstrap means, drawing indices on the fly (no index matrix)."""
+        means = np.empty((iters, sizes.size))
+        for i in numba.prange(iters):
+            np.random.seed(seed + i)  # numba keeps one generator per thread
+            for g in range(sizes.size):
+                start, size = starts[g], sizes[g]
+                acc = 0.0
+                for _ in range(size):
+                    acc += x[start + np.random.randint(0, size)]
+                means[i, g] = acc / size
+        return means
+else:
+    _bootstrap_means_jit = None
+
+
+def bootstrap_ci_groups(x: np.ndarray, counts: np.ndarray, iters: int = 200, alpha: float = 0.05,
+                        rng: np.random.Generator | None = None, max_elems: int = 1 << 22,
+                        workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bootstrap CIs for the mean of many groups at once.
+
+    `x` holds the groups back to back (group g spans `counts[g]` values). Each
+    resample row redraws every group within its own span, so one row gives one
+    bootstrap mean per group via np.add.reduceat. Rows are processed in blocks
+    of at most `max_elems` draws to bound the temporary index matrix.
+    Empty groups get NaN bounds.
+
+    With workers > 1 the groups are split into runs of roughly equal size and
+    resampled on a thread pool (NumPy releases the GIL in the gather/reduce),
+    each run with its own child generator spawned from `rng`.
+
+    When numba is installed, a JIT'd kernel parallel over resamples is used
+    instead, on `workers` threads (capped at numba's pool), seeded from `rng`.
+    """
+    if rng is None:
+        rng = np.random.default_rng(42)
+    counts = np.asarray(counts, dtype=np.intp)
+    x = np.asarray(x, dtype=float)[:counts.sum()]
+    lo = np.full(counts.size, np.nan)
+    hi = np.full(counts.size, np.nan)
+    nonempty = counts > 0
+    if x.size == 0 or not nonempty.any():
+        return lo, hi
+
+    sizes = counts[nonempty]
+    if _bootstrap_means_jit is not None:
+        starts = np.cumsum(sizes) - sizes
+        seed = int(rng.integers(1 << 31))
+        # Each resample reseeds from `seed`, so the result is the same for any thread count
+        threads = numba.get_num_threads()
+        numba.set_num_threads(min(max(workers, 1), numba.config.NUMBA_NUM_THREADS))
+        try:
+            means = _bootstrap_means_jit(np.ascontiguousarray(x), starts, sizes, iters, seed)
+        finally:
+            numba.set_num_threads(threads)
+    elif workers <= 1:
+        means = _bootstrap_means(x, sizes, iters, rng, max_elems)
+    else:
+        ends = np.cumsum(sizes)
+        offsets = np.concatenate([[0], ends])
+        cuts = np.unique(np.searchsorted(ends, np.linspace(0, x.size, workers + 1)[1:-1], side="right"))
+        runs = np.split(np.arange(sizes.size), cuts[(cuts > 0) & (cuts < sizes.size)])
+        per_worker = max(1, max_elems // len(runs))
+
+        def run(job: Tuple[np.ndarray, np.random.Generator]) -> np.ndarray:
+            groups, child = job
+            part = x[offsets[groups[0]]:offsets[groups[-1] + 1]]
+            return _bootstrap_means(part, sizes[groups], iters, child, per_worker)
+
+        with cf.ThreadPoolExecutor(max_workers=workers) as ex:
+            means = np.concatenate(list(ex.map(run, zip(runs, rng.spawn(len(runs))))), axis=1)
+    lo[nonempty], hi[nonempty] = np.quantile(means, [alpha/2, 1 - alpha/2], axis=0)
+    return lo, hi
+
+
+def compute_features(df: pd.DataFrame, n_components: int = 1) -> pd.DataFrame:
     texts = df["content"].astype(str).tolist()
 
     # Lightweight lexical features
-    df["polarity"] = lexicon_polarity(texts)
-    df["urgency"]  = urgency_score(texts)
+    polarity, urgency, _ = lexicon_scores(texts)
 
     # Engagement
-    df["engagement"] = np.log1p(df["likes"] + df["retweets"] + df["replies"])
+    engagement = np.log1p((df["likes"] + df["retweets"] + df["replies"]).to_numpy())
 
     # TF-IDF + SVD
-    Z, artifacts = build_tfidf_svd(texts, max_features=5000, n_components=6)
-    for i in range(Z.shape[1]):
-        df[f"svd_{i+1}"] = Z[:, i]
+    X, _ = build_tfidf(texts)
+    Z = top_svd_component(X, n_components=n_components)
 
     # Composite signal (z-scored components)
-    comp = 0.4 * zscore(df["polarity"].to_numpy()) \
-         + 0.3 * zscore(df["engagement"].to_numpy()) \
-         + 0.3 * zscore(df["svd_1"].to_numpy())
-    df["composite_signal"] = comp
-
-    return df[["uid","timestamp","username","hashtag_primary","_hashtags_list","polarity","urgency","engagement","svd_1","composite_signal"]]
-
+    comp = zscore(polarity)
+    comp *= 0.4
+    comp += 0.3 * zscore(engagement)
+    comp += 0.3 * zscore(Z[:, 0])
+
+    # All new columns are attached in one construction (no per-column inserts)
+    new_cols = {
+        "polarity": polarity,
+        "urgency": urgency,
+        "engagement": engagement,
+        **{f"svd_{i+1}": Z[:, i] for i in range(Z.shape[1])},
+        "composite_signal": comp,
+    }
+    keep = df[["uid","timestamp","username","hashtag_primary","_hashtags_list"]]
+    return pd.concat([keep, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
+
+def aggregate_signals(features: pd.DataFrame, freq: str = "1H", bootstrap_workers: int = 1,
+                      by_hashtag: bool = False) -> pd.DataFrame:
+    """
+    Aggregate to time buckets and estimate bootstrap CIs.
 
-def aggregate_signals(features: pd.DataFrame, freq: str = "1H") -> pd.DataFrame:
-    """Aggregate to time buckets and estimate bootstrap CIs."""
-    features = features.copy()
-    features["timestamp"] = pd.to_datetime(features["timestamp"], utc=True)
-    features = features.set_index("timestamp")
+    With by_hashtag, buckets are per hashtag_primary (tweets without one are
+    left out) and rows come out sorted by hashtag, so each hashtag occupies a
+    contiguous range and Parquet row-group statistics on it stay tight.
+    """
+    if by_hashtag:
+        tags = features["hashtag_primary"].astype("string")
+        keep = tags.fillna("") != ""
+        parts = []
+        for tag, group in features[keep].groupby(tags[keep], sort=True):
+            agg = aggregate_signals(group, freq=freq, bootstrap_workers=bootstrap_workers)
+            agg.insert(0, "hashtag_primary", tag)
+            parts.append(agg)
+        if not parts:
+            return pd.DataFrame(columns=["hashtag_primary","timestamp","signal","n","ci_lo","ci_hi"])
+        return pd.concat(parts, ignore_index=True)
+    # Only the timestamp and the signal are needed; load_minimal already parsed
+    # timestamps, so other callers' inputs are the only ones converted here.
+    ts = features["timestamp"]
+    if not isinstance(ts.dtype, pd.DatetimeTZDtype):
+        ts = pd.to_datetime(ts, utc=True)
+    features = pd.DataFrame(
+        {"composite_signal": features["composite_signal"].to_numpy()},
+        index=pd.DatetimeIndex(ts, name="timestamp"),
+    )
+    features = features.sort_index()
     grouped = features.groupby(pd.Grouper(freq=freq))
 
     agg = grouped["composite_signal"].agg(["mean","count"]).reset_index().rename(columns={"mean":"signal","count":"n"})
-    # Compute confidence intervals per group
-    ci_lo = []
-    ci_hi = []
-    for ts, sub in grouped:
-        lo, hi = bootstrap_ci(sub["composite_signal"].to_numpy(), iters=200, alpha=0.05)
-        ci_lo.append(lo)
-        ci_hi.append(hi)
+    # Rows are time-sorted, so each bucket is a contiguous run of grouped.size()
+    # rows: all buckets are bootstrapped together in one vectorized pass.
+    sizes = grouped.size().to_numpy()
+    ci_lo, ci_hi = bootstrap_ci_groups(features["composite_signal"].to_numpy(), sizes, iters=200, alpha=0.05,
+                                       workers=bootstrap_workers)
     agg["ci_lo"] = ci_lo
     agg["ci_hi"] = ci_hi
     return agg
 
 
-def write_parquet(df: pd.DataFrame, out_path: Path) -> None:
+def write_parquet(df: pd.DataFrame, out_path: Path, sorted_by: Sequence[str] = ()) -> None:
+    # zstd + large row groups/pages for column-pruned scans; row-group
+    # statistics let readers skip groups on filters. `sorted_by` records the
+    # (ascending) order the rows are already in as Parquet sorting metadata.
     table = pa.Table.from_pandas(df, preserve_index=False)
-    pq.write_table(table, out_path, compression="snappy")
+    sorting = pq.SortingColumn.from_ordering(table.schema, [(c, "ascending") for c in sorted_by]) if sorted_by else None
+    pq.write_table(
+        table, out_path,
+        compression="zstd", compression_level=5, use_dictionary=True,
+        row_group_size=PARQUET_ROW_GROUP_SIZE, data_page_size=PARQUET_PAGE_SIZE, write_statistics=True,
+        sorting_columns=sorting,
+    )
 
 
 def main():
     ap = argparse.ArgumentParser(description="Build features and composite trading signals")
-    ap.add_argument("--parquet", type=Path, required=True, help="Input parquet from ingest phase")
+    ap.add_argument("--parquet", type=Path, required=True, help="Input parquet dataset from ingest phase")
+    ap.add_argument("--start_date", type=date.fromisoformat, default=None, help="Only tweets on/after this date (YYYY-MM-DD)")
+    ap.add_argument("--end_date", type=date.fromisoformat, default=None, help="Only tweets on/before this date (YYYY-MM-DD)")
     ap.add_argument("--out_dir", type=Path, required=True, help="Output directory for features & signals")
     ap.add_argument("--freq", type=str, default="1H", help="Aggregation frequency (e.g., 15T, 1H)")
+    ap.add_argument("--svd_components", type=int, default=1, help="TF-IDF SVD components to keep (svd_1 feeds the composite)")
+    ap.add_argument("--by_hashtag", action="store_true", help="Aggregate signals per hashtag_primary (enables visualize --hashtag)")
+    ap.add_argument("--bootstrap_workers", type=int, default=4, help="Threads for bootstrap CIs (thread pool, or the numba kernel when installed)")
     ap.add_argument("-v", "--verbose", action="count", default=0)
     args = ap.parse_args()
 
     setup_logging(args.verbose)
     args.out_dir.mkdir(parents=True, exist_ok=True)
 
-    df = load_minimal(args.parquet)
+    df = load_minimal(args.parquet, start_date=args.start_date, end_date=args.end_date)
     logger.info("Loaded %d rows", len(df))
 
-    feats = compute_features(df)
+    feats = compute_features(df, n_components=args.svd_components)
     write_parquet(feats, args.out_dir / "features.parquet")
     logger.info("Wrote per-tweet features -> %s", args.out_dir / "features.parquet")
 
-    sigs = aggregate_signals(feats, freq=args.freq)
-    write_parquet(sigs, args.out_dir / "signals.parquet")
+    sigs = aggregate_signals(feats, freq=args.freq, bootstrap_workers=args.bootstrap_workers, by_hashtag=args.by_hashtag)
+    # aggregate_signals emits time order (per hashtag with --by_hashtag)
+    write_parquet(sigs, args.out_dir / "signals.parquet",
+                  sorted_by=["hashtag_primary", "timestamp"] if args.by_hashtag else ["timestamp"])
     logger.info("Wrote aggregated signals -> %s", args.out_dir / "signals.parquet")
 
 if __name__ == "__main__":
@@ -18,39 +18,47 @@ schemas—ideal for analytical workloads and ML pipelines.
 
 Inputs
 ------
-- One or more .json / .csv files. JSON can be a single JSON array, a dict,
-  or JSON Lines (one object per line). CSV should have the expected columns.
+- One or more .json / .csv / .parquet files. JSON can be a single JSON array,
+  a dict, or JSON Lines (one object per line). CSV and Parquet (the scraper's
+  output) should have the expected columns.
 - Example keys: username, timestamp, content, replies, retweets, likes,
   mentions, hashtags, urls, scraped_at.
 
 Outputs
 -------
-- A single Parquet file (combined) with normalized schema.
+- A Parquet dataset (directory) with normalized schema, hive-partitioned by
+  date so readers can prune by day.
 - A small run metadata JSON file describing what was processed.
 
 Notes
 -----
-- Optimized for simplicity and correctness; threading used for I/O-bound reads.
-- For big data, prefer partitioned datasets (date/hashtag). This minimal
-  version produces one file but keeps memory bounded by per-file batching.
+- Optimized for simplicity and correctness; standardization is CPU-bound, so
+  files are processed in a process pool and handed back as Arrow tables.
+- Memory stays bounded by per-file batching: tables are streamed into the
+  dataset writer as workers finish them.
 """
 
 from __future__ import annotations
 import argparse
 import concurrent.futures as cf
 import hashlib
+import itertools
 import json
 import logging
 import re
 import unicodedata
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Any
+from typing import Iterable, List, Any, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.json as pajson
 import pyarrow.parquet as pq
 
 
@@ -73,10 +81,24 @@ logger = logging.getLogger("ingest")
 
 # ---------------------------- Utilities ---------------------------------
 
-CONTROL_CHARS_RE = re.compile(r"[\u0000-\u001f\u007f-\u009f]")
-WS_RE = re.compile(r"\s+")
-HASHTAG_RE = re.compile(r"(?u)#\w+")
-MENTION_RE = re.compile(r"(?u)@\w+")
+CONTROL_CHARS_RE = re.compile(r"[\x00-\x1f\x7f-\x9f]")
+# str.translate table mapping the same control chars to spaces (C-level, no regex)
+CONTROL_CHARS_TT = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)], ord(" "))
+# Unicode whitespace runs, written for Arrow's RE2 engine (its \s is ASCII-only)
+WS_RE2 = r"[\s\p{Z}]+"
+# Unicode \w run at the start of a string, for RE2 (same chars as Python's (?u)\w)
+TAG_WORD_RE2 = r"^(?P<word>[\p{L}\p{N}_]+)"
+
+TEXT_DTYPE = pd.StringDtype("pyarrow")
+ARROW_BLOCK_SIZE = 16 << 20  # bytes per block for Arrow's JSON/CSV readers
+# Low-cardinality columns stored as categoricals (Parquet dictionary pages).
+# Indices are pinned to int32 so every file's table shares one writer schema.
+CATEGORY_COLUMNS = ("username", "hashtag_primary", "source_file")
+CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+PARQUET_ROW_GROUP_SIZE = 262_144  # rows
+PARQUET_PAGE_SIZE = 1 << 20  # bytes
+PARQUET_ROWS_PER_FILE = 1_000_000
+DATE_PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
 
 EXPECTED_COLUMNS = [
     "username", "timestamp", "content",
@@ -85,21 +107,24 @@ EXPECTED_COLUMNS = [
     "scraped_at"
 ]
 
+def is_missing(x: Any) -> bool:
+    """None / NaN / pd.NA (the latter comes from Arrow-backed columns)."""
+    return x is None or x is pd.NA or (isinstance(x, float) and np.isnan(x))
+
 def normalize_text(s: Any) -> str:
     """Unicode-normalize (NFC), strip control chars and collapse whitespace."""
-    if s is None or (isinstance(s, float) and np.isnan(s)):
+    if is_missing(s):
         return ""
     s = str(s)
     s = unicodedata.normalize("NFC", s)
-    s = CONTROL_CHARS_RE.sub(" ", s)
-    s = WS_RE.sub(" ", s).strip()
-    return s
+    s = s.translate(CONTROL_CHARS_TT)
+    return " ".join(s.split())
 
 def parse_listish(x: Any) -> List[str]:
     """Parse hashtags/mentions that may come as 'a, b, c' or ['a','b'] or ''."""
-    if x is None or (isinstance(x, float) and np.isnan(x)):
+    if is_missing(x):
         return []
-    if isinstance(x, (list, tuple, set)):
+    if isinstance(x, (list, tuple, set, np.ndarray)):
         return [normalize_text(i).lower() for i in x if str(i).strip()]
     s = normalize_text(x)
     if not s:
@@ -108,33 +133,126 @@ def parse_listish(x: Any) -> List[str]:
     parts = [p.strip() for p in re.split(r"[,\s]+", s) if p.strip()]
     return [p.lower() for p in parts]
 
-def extract_hashtags(text: str, existing: List[str]) -> List[str]:
-    found = [h.lower() for h in HASHTAG_RE.findall(text or "")]
-    return sorted(set(existing + found))
+def nfc_arrow(arr: pa.Array) -> pa.Array:
+    """
+    NFC-normalize an Arrow string array.
 
-def extract_mentions(text: str, existing: List[str]) -> List[str]:
-    found = [m.lower() for m in MENTION_RE.findall(text or "")]
-    return sorted(set(existing + found))
+    ASCII strings are already NFC, so only the non-ASCII ones go through
+    unicodedata (pc.utf8_normalize is avoided: pyarrow 21 returns decomposed
+    output for form="NFC").
+    """
+    todo = pc.invert(pc.fill_null(pc.string_is_ascii(arr), True))
+    idx = np.flatnonzero(todo.to_numpy(zero_copy_only=False))
+    if idx.size == 0:
+        return arr
+    fixed = [unicodedata.normalize("NFC", t) for t in arr.take(idx).to_pylist()]
+    return pc.replace_with_mask(arr, todo, pa.array(fixed, type=arr.type))
+
+def normalize_text_arrow(arr: pa.Array | pa.ChunkedArray) -> pa.Array:
+    """normalize_text over a whole Arrow string array with compute kernels (null -> "")."""
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    arr = nfc_arrow(arr)
+    arr = pc.replace_substring_regex(arr, CONTROL_CHARS_RE.pattern, " ")
+    arr = pc.replace_substring_regex(arr, WS_RE2, " ")
+    return pc.fill_null(pc.utf8_trim_whitespace(arr), "")
+
+def normalize_text_col(col: pd.Series) -> pd.Series:
+    """Column-wide normalize_text: one cast to Arrow strings, then normalize_text_arrow."""
+    arr = pa.array(col.astype(TEXT_DTYPE))
+    return pd.Series(pd.arrays.ArrowStringArray(normalize_text_arrow(arr)), index=col.index)
+
+def find_tags(content: pd.Series, sigil: str) -> Tuple[pa.Array, pa.Array]:
+    r"""
+    Arrow-side equivalent of content.str.findall(sigil + r"\w+"), lowercased.
+
+    Returns flat (row, tag) arrays: the text after each sigil is matched
+    against TAG_WORD_RE2, and pieces with no word character are dropped.
+    """
+    pieces = pc.list_slice(pc.split_pattern(pa.array(content, type=pa.string()), sigil), 1)
+    rows = pc.list_parent_indices(pieces)
+    words = pc.struct_field(pc.extract_regex(pc.list_flatten(pieces), TAG_WORD_RE2), [0])
+    keep = pc.is_valid(words)
+    tags = pc.binary_join_element_wise(sigil, pc.utf8_lower(words.filter(keep)), "")
+    return rows.filter(keep), tags
+
+def parse_tag_col(col: pd.Series) -> Tuple[pa.Array, pa.Array]:
+    """
+    Column-wide parse_listish, returned as flat (row, tag) arrays.
 
-def coerce_int(x: Any) -> int:
-    try:
-        return int(x)
-    except Exception:
-        return 0
+    String columns are normalized and split by Arrow kernels, Arrow list
+    columns (JSON Lines) are flattened and normalized element-wise; only
+    object columns holding Python lists fall back to per-cell parsing.
+    """
+    if isinstance(col.dtype, pd.ArrowDtype) and pa.types.is_list(col.dtype.pyarrow_dtype):
+        lists = pa.array(col)
+        rows = pc.list_parent_indices(lists)
+        tags = pc.utf8_lower(normalize_text_arrow(pc.list_flatten(lists).cast(pa.string())))
+    elif col.dtype == object and pd.api.types.infer_dtype(col, skipna=True) not in ("string", "empty"):
+        lists = pa.array(col.map(parse_listish), type=pa.list_(pa.string()))
+        return pc.list_parent_indices(lists), pc.list_flatten(lists)
+    else:
+        parts = pc.split_pattern_regex(pa.array(normalize_text_col(col), type=pa.string()), r"[,\s]+")
+        rows = pc.list_parent_indices(parts)
+        tags = pc.utf8_lower(pc.list_flatten(parts))
+    keep = pc.not_equal(tags, "")
+    return rows.filter(keep), tags.filter(keep)
 
-def to_utc(ts: Any) -> pd.Timestamp:
-    """Best-effort parse to UTC tz-aware timestamp."""
-    try:
-        t = pd.to_datetime(ts, utc=True, errors="coerce")
-        if pd.isna(t):
-            return pd.NaT
-        return t
-    except Exception:
-        return pd.NaT
+def extract_tags(content: pd.Series, existing_col: pd.Series, sigil: str) -> pa.ListArray:
+    """
+    Sorted union of the parsed existing_col tags and the sigil-prefixed words
+    found in content, per row, in a single pass over both columns.
+
+    The (row, tag) pairs from both sources are de-duplicated by an Arrow
+    group-by and sorted once, then sliced back into one list per row.
+    """
+    rows_e, tags_e = parse_tag_col(existing_col)
+    rows_f, tags_f = find_tags(content, sigil)
+    pairs = pa.table({
+        "row": pa.chunked_array([rows_e, rows_f], type=pa.int64()),
+        "tag": pa.chunked_array([tags_e, tags_f], type=pa.string()),
+    })
+    pairs = pairs.group_by(["row", "tag"]).aggregate([])
+    pairs = pairs.sort_by([("row", "ascending"), ("tag", "ascending")])
+    counts = np.bincount(pairs["row"].to_numpy(), minlength=len(content))
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int32)
+    return pa.ListArray.from_arrays(pa.array(offsets), pairs["tag"].combine_chunks())
+
+def coerce_int_col(col: pd.Series) -> pd.Series:
+    """Coerce a column to int64; non-numeric, missing or infinite values become 0."""
+    num = pd.to_numeric(col, errors="coerce").astype("float64")
+    return num.where(np.isfinite(num), 0).astype("int64")
+
+def timestamp_key_col(ts: pd.Series) -> pd.Series:
+    """
+    Format a UTC timestamp column exactly like str(pd.Timestamp).
+
+    Whole-second values (nearly all tweets) are formatted by Arrow's strftime;
+    only sub-second values fall back to str(), and NaT becomes "NaT".
+    """
+    whole = ts.dt.floor("s")
+    arr = pc.strftime(pa.array(whole, type=pa.timestamp("s", tz="UTC")), format="%Y-%m-%d %H:%M:%S+00:00")
+    out = pd.Series(pd.arrays.ArrowStringArray(arr), index=ts.index)
+    frac = ts.notna() & (ts != whole)
+    if frac.any():
+        out[frac] = ts[frac].map(str)
+    return out.fillna("NaT")
+
+def stable_uids(username: pd.Series, timestamp: pd.Series, content: pd.Series) -> Tuple[List[str], np.ndarray]:
+    """
+    SHA-1 of "username|timestamp|content" per row (hex), stable across runs.
 
-def stable_uid(username: str, timestamp: pd.Timestamp, content: str) -> str:
-    raw = f"{username}|{timestamp}|{content}"
-    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    The keys are concatenated column-wise by Arrow string kernels, so the only
+    per-row Python work left is the hashlib call on the encoded bytes. Also
+    returns the first 8 digest bytes as uint64 dedup keys, which hash and
+    compare far cheaper than the 40-char hex strings.
+    """
+    keys = username + "|" + timestamp_key_col(timestamp) + "|" + content
+    sha1 = hashlib.sha1
+    digests = [sha1(k).digest() for k in keys.str.encode("utf-8")]
+    raw = np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 20)
+    dedup_keys = np.ascontiguousarray(raw[:, :8]).view(np.uint64).ravel()
+    return [d.hex() for d in digests], dedup_keys
 
 def standardize_df(df: pd.DataFrame, source_file: str) -> pd.DataFrame:
     # Normalize columns
@@ -148,41 +266,34 @@ def standardize_df(df: pd.DataFrame, source_file: str) -> pd.DataFrame:
         if c not in df.columns:
             df[c] = None
 
-    # Normalize text fields
-    df["username"] = df["username"].map(normalize_text)
-    df["content"] = df["content"].map(normalize_text)
-    df["urls"] = df["urls"].map(normalize_text)
+    # Normalize text fields (whole-column string kernels)
+    df["username"] = normalize_text_col(df["username"])
+    df["content"] = normalize_text_col(df["content"])
+    df["urls"] = normalize_text_col(df["urls"])
 
     # Numeric engagements
-    df["replies"] = df["replies"].map(coerce_int)
-    df["retweets"] = df["retweets"].map(coerce_int)
-    df["likes"] = df["likes"].map(coerce_int)
-
-    # Mentions/hashtags
-    m_list = df["mentions"].map(parse_listish)
-    h_list = df["hashtags"].map(parse_listish)
-    df = df.assign(_mentions_list=m_list, _hashtags_list=h_list)
-
-    # Extract from content too
-    df["_mentions_list"] = [
-        extract_mentions(txt, ms) for txt, ms in zip(df["content"], df["_mentions_list"])
-    ]
-    df["_hashtags_list"] = [
-        extract_hashtags(txt, hs) for txt, hs in zip(df["content"], df["_hashtags_list"])
-    ]
+    df["replies"] = coerce_int_col(df["replies"])
+    df["retweets"] = coerce_int_col(df["retweets"])
+    df["likes"] = coerce_int_col(df["likes"])
 
-    # Timestamps
-    df["timestamp"] = df["timestamp"].map(to_utc)
-    df["scraped_at"] = df["scraped_at"].map(to_utc)
+    # Mentions/hashtags, merged with the ones found in content
+    mentions = extract_tags(df["content"], df["mentions"], "@")
+    hashtags = extract_tags(df["content"], df["hashtags"], "#")
+    df["_mentions_list"] = pd.arrays.ArrowExtensionArray(mentions)
+    df["_hashtags_list"] = pd.arrays.ArrowExtensionArray(hashtags)
+
+    # Timestamps (format="mixed" parses each value independently, like to_utc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce", format="mixed")
+    df["scraped_at"] = pd.to_datetime(df["scraped_at"], utc=True, errors="coerce", format="mixed")
 
     # Core identifiers
-    df["uid"] = [
-        stable_uid(u, t, c) for u, t, c in zip(df["username"], df["timestamp"], df["content"])
-    ]
+    df["uid"], dedup_keys = stable_uids(df["username"], df["timestamp"], df["content"])
 
     # Derivations
-    df["hashtag_primary"] = [hs[0] if hs else "" for hs in df["_hashtags_list"]]
-    df["date"] = df["timestamp"].dt.date.astype("string")
+    first = pc.list_flatten(pc.list_slice(hashtags, 0, 1, return_fixed_size_list=True))
+    df["hashtag_primary"] = pd.Series(pc.fill_null(first, ""), index=df.index, dtype=TEXT_DTYPE)
+    # Native DATE32 (UTC calendar day) straight from the timestamp buffer
+    df["date"] = pd.arrays.ArrowExtensionArray(pa.array(df["timestamp"]).cast(pa.date32()))
 
     # Reorder columns
     core = [
@@ -192,12 +303,12 @@ def standardize_df(df: pd.DataFrame, source_file: str) -> pd.DataFrame:
         "scraped_at", "hashtag_primary", "date"
     ]
     others = [c for c in df.columns if c not in core]
-    df = df[core + others]
-    df["source_file"] = source_file
+    df = df[core + others].assign(source_file=source_file)
+    df = df.astype({c: "category" for c in CATEGORY_COLUMNS})
 
     # Drop exact duplicates by uid
     before = len(df)
-    df = df.drop_duplicates(subset=["uid"])
+    df = df[~pd.Series(dedup_keys).duplicated().to_numpy()]
     deduped = before - len(df)
     if deduped:
         logger.info("Dropped %d duplicate rows in %s", deduped, source_file)
@@ -207,30 +318,61 @@ def standardize_df(df: pd.DataFrame, source_file: str) -> pd.DataFrame:
 # ---------------------------- Loaders ---------------------------------
 
 def load_json_file(path: Path) -> pd.DataFrame:
-    # Try different JSON shapes: array, object, or JSON Lines
+    # JSON Lines (the common dump shape) goes through Arrow's multithreaded
+    # parser straight into Arrow-backed columns, without a Python object tree.
     try:
+        table = pajson.read_json(path, read_options=pajson.ReadOptions(block_size=ARROW_BLOCK_SIZE))
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    except pa.ArrowInvalid:
+        pass
+    # Arrow rejects a single JSON array / pretty-printed object, and JSON Lines
+    # whose columns change type between rows; pandas reads the latter as object
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1024).lstrip()[:1]
+    try:
+        if first != "[":
+            try:
+                return pd.read_json(path, lines=True)
+            except ValueError:
+                pass
         obj = json.loads(Path(path).read_text(encoding="utf-8"))
         if isinstance(obj, dict):
             obj = [obj]
         return pd.DataFrame(obj)
     except Exception:
-        # Try JSON lines with pandas (chunked for memory efficiency)
-        try:
-            reader = pd.read_json(path, lines=True, chunksize=5000, encoding="utf-8")
-            chunks = [chunk for chunk in reader]
-            if not chunks:
-                return pd.DataFrame()
-            return pd.concat(chunks, ignore_index=True)
-        except Exception as e:
-            logger.exception("Failed to parse JSON: %s", path)
-            raise
+        logger.exception("Failed to parse JSON: %s", path)
+        raise
 
 def load_csv_file(path: Path) -> pd.DataFrame:
-    # robust CSV load
+    # Arrow's block-parallel CSV reader; empty cells become nulls like pandas
     try:
-        return pd.read_csv(path, encoding="utf-8")
-    except UnicodeDecodeError:
-        return pd.read_csv(path, encoding="utf-8", engine="python", errors="ignore")
+        table = pacsv.read_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+            convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+        )
+    except pa.ArrowInvalid:
+        table = None
+    # Arrow types columns with invalid UTF-8 as binary: let pandas drop the
+    # undecodable bytes instead
+    if table is None or any(pa.types.is_binary(f.type) for f in table.schema):
+        return pd.read_csv(path, encoding="utf-8", encoding_errors="ignore")
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def load_parquet_file(path: Path) -> pd.DataFrame:
+    # Scraper output. Dictionary-encoded columns are decoded to plain strings
+    # and empty strings become nulls, so standardization sees what the CSV
+    # reader (strings_can_be_null) would have produced for the same tweets.
+    table = pq.read_table(path)
+    for i, field in enumerate(table.schema):
+        col = table[field.name]
+        if pa.types.is_dictionary(field.type):
+            col = col.cast(field.type.value_type)
+        if pa.types.is_string(col.type):
+            col = pc.if_else(pc.equal(col, ""), pa.scalar(None, pa.string()), col)
+        table = table.set_column(i, field.name, col)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
 
 
 def load_and_standardize(path: Path) -> pd.DataFrame:
@@ -239,6 +381,8 @@ def load_and_standardize(path: Path) -> pd.DataFrame:
         df = load_json_file(path)
     elif ext == ".csv":
         df = load_csv_file(path)
+    elif ext == ".parquet":
+        df = load_parquet_file(path)
     else:
         logger.warning("Skipping unsupported file type: %s", path)
         return pd.DataFrame()
@@ -246,54 +390,84 @@ def load_and_standardize(path: Path) -> pd.DataFrame:
         return df
     return standardize_df(df, source_file=str(path.name))
 
+def load_and_standardize_to_arrow(path: Path) -> Optional[pa.Table]:
+    """
+    Process-pool entry point: standardize one file and return it as an Arrow
+    table, which pickles as flat buffers (unlike DataFrames with list columns).
+
+    The pandas schema metadata is dropped: it would record Arrow-backed dtypes
+    (e.g. "list<item: string>[pyarrow]") that readers cannot restore.
+    """
+    df = load_and_standardize(path)
+    if df.empty:
+        return None
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    for c in CATEGORY_COLUMNS:
+        i = table.schema.get_field_index(c)
+        table = table.set_column(i, c, table[c].cast(CATEGORY_TYPE))
+    return table
+
 
 # ---------------------------- Parquet Writer ---------------------------
 
-def write_parquet_stream(dfs: Iterable[pd.DataFrame], out_path: Path) -> int:
+def write_parquet_dataset(tables: Iterable[Optional[pa.Table]], out_dir: Path) -> int:
     """
-    Stream-write concatenated DataFrames to a single Parquet file.
+    Stream Arrow tables into a hive-partitioned Parquet dataset:
+    out_dir/date=YYYY-MM-DD/part-N.parquet.
 
     Notes:
-    - ParquetWriter allows writing multiple row groups to the SAME file within
-      a run. We do NOT append to an already closed file.
+    - Readers touch only the date partitions (and columns) they ask for.
+    - Dates written by this run replace the same dates already under out_dir
+      (delete_matching); other dates are kept. Rows without a timestamp go to
+      date=__HIVE_DEFAULT_PARTITION__.
     """
+    tables = (t for t in tables if t is not None and t.num_rows)
+    first = next(tables, None)
+    if first is None:
+        return 0
     count = 0
-    writer = None
-    try:
-        for df in dfs:
-            if df is None or df.empty:
-                continue
-            table = pa.Table.from_pandas(df, preserve_index=False)
-            if writer is None:
-                writer = pq.ParquetWriter(out_path, table.schema, compression="snappy")
-            writer.write_table(table)
-            count += len(df)
-        return count
-    finally:
-        if writer is not None:
-            writer.close()
+
+    def batches() -> Iterable[pa.RecordBatch]:
+        nonlocal count
+        for table in itertools.chain([first], tables):
+            count += table.num_rows
+            yield from table.to_batches()
+
+    ds.write_dataset(
+        batches(), out_dir, schema=first.schema, format="parquet",
+        partitioning=DATE_PARTITIONING, existing_data_behavior="delete_matching",
+        basename_template="part-{i}.parquet",
+        max_rows_per_file=PARQUET_ROWS_PER_FILE, max_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression="zstd", compression_level=5, use_dictionary=True,
+            data_page_size=PARQUET_PAGE_SIZE, write_statistics=True,
+        ),
+    )
+    return count
 
 
 # ---------------------------- CLI / Main -------------------------------
 
 def discover_files(input_dir: Path) -> List[Path]:
     files = []
-    for ext in ("*.json", "*.csv"):
+    for ext in ("*.json", "*.csv", "*.parquet"):
         files.extend(input_dir.glob(ext))
     return sorted(files)
 
 def main():
     ap = argparse.ArgumentParser(description="Ingest Twitter-like dumps -> clean Parquet")
-    ap.add_argument("--input_dir", type=Path, required=True, help="Directory with JSON/CSV files")
+    ap.add_argument("--input_dir", type=Path, required=True, help="Directory with JSON/CSV/Parquet files")
     ap.add_argument("--out_dir", type=Path, required=True, help="Output directory")
-    ap.add_argument("--workers", type=int, default=4, help="Thread workers for file I/O")
-    ap.add_argument("--outfile", type=str, default="tweets_combined.parquet", help="Parquet filename")
+    ap.add_argument("--workers", type=int, default=4, help="Worker processes for parsing/standardizing files")
+    ap.add_argument("--outfile", type=str, default="tweets_combined.parquet", help="Parquet dataset directory name")
     ap.add_argument("-v", "--verbose", action="count", default=0)
     args = ap.parse_args()
 
     setup_logging(args.verbose)
     args.out_dir.mkdir(parents=True, exist_ok=True)
     out_path = args.out_dir / args.outfile
+    if out_path.is_file():
+        out_path.unlink()  # single-file output of older runs; now a dataset directory
 
     files = discover_files(args.input_dir)
     if not files:
@@ -302,10 +476,13 @@ def main():
 
     logger.info("Found %d files", len(files))
 
-    # Concurrent reading + standardization (I/O bound -> threads are fine)
-    with cf.ThreadPoolExecutor(max_workers=args.workers) as ex:
-        dfs_iter = ex.map(load_and_standardize, files)
-        total_rows = write_parquet_stream(dfs_iter, out_path)
+    # Parallel reading + standardization (CPU bound -> processes, not threads).
+    # Workers return Arrow tables; the single Parquet writer stays here.
+    with cf.ProcessPoolExecutor(
+        max_workers=args.workers, initializer=setup_logging, initargs=(args.verbose,)
+    ) as ex:
+        tables_iter = ex.map(load_and_standardize_to_arrow, files)
+        total_rows = write_parquet_dataset(tables_iter, out_path)
 
     # Write a small run metadata
     meta = {
@@ -313,7 +490,7 @@ def main():
         "rows_written": total_rows,
         "created_at": datetime.utcnow().isoformat() + "Z",
         "parquet_path": str(out_path),
-        "note": "Single-file parquet; for large-scale use partitioned datasets."
+        "note": "Hive-partitioned parquet dataset (date=YYYY-MM-DD)."
     }
     (args.out_dir / "ingest_metadata.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
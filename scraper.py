@@ -12,10 +12,14 @@ and URLs.
 Features:
 - Browser setup with anti-detection measures (e.g., stealth mode, randomized user agents).
 - Manual or session-based login to Twitter.
-- Hashtag-based tweet scraping with deduplication.
+- Hashtag-based tweet scraping with deduplication, several hashtags at a time
+  (one browser context each, sharing the logged-in session).
 - Human-like interaction patterns (e.g., typing, scrolling, mouse movements).
-- Data extraction, including tweet content, engagement metrics, and metadata.
-- Saves data in CSV and JSON formats, with summary statistics.
+- Data extraction from the timeline's SearchTimeline GraphQL responses (DOM
+  scraping only as a fallback), including tweet content, engagement metrics,
+  and metadata.
+- Journals tweets to CSV while scraping and saves one Parquet file per hashtag,
+  with JSON summary statistics.
 
 Usage:
 - Configure hashtags and the number of tweets per hashtag in the `main()` function.
@@ -23,9 +27,8 @@ Usage:
 - Outputs are saved in the `twitter_data/` directory.
 
 Dependencies:
-- Playwright (with Chromium browser)
-- BeautifulSoup (for HTML parsing)
-- Pandas (for data handling)
+- Playwright (with Chromium browser) and playwright-stealth
+- orjson (session/manifest/stats files), PyArrow (Parquet output)
 
 Entry Point:
 - The `main()` function serves as the entry point for the script.
@@ -33,18 +36,246 @@ Entry Point:
 """
 
 import asyncio
-import json
+import csv
 import random
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urlparse
 import re
-import hashlib
 
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright_stealth import Stealth
 
-from bs4 import BeautifulSoup
-import pandas as pd
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+# Link classifiers for the DOM fallback, compiled once
+_USER_HREF_RE = re.compile(r'^/[^/]+$')
+_URL_HREF_RE = re.compile(r'^https?://')
+
+# Mentions / hashtags in tweet text (not preceded by a word char, e.g. emails).
+# Hashtag bodies run to whitespace/punctuation rather than \w, which would cut
+# Indic tags at their combining vowel signs
+_MENTION_RE = re.compile(r'(?<!\w)@(\w{1,15})')
+_HASHTAG_RE = re.compile(r'(?<!\w)#([^\s!-/:-@\[-^`{-~\u2000-\u206f\u3000-\u303f]+)')
+
+# Requests aborted in every context. Stylesheets are kept: layout drives the
+# timeline's lazy loading and scroll height.
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+BLOCKED_HOSTS = {'pbs.twimg.com', 'video.twimg.com'}
+
+# Per-hashtag output schema (the tweet dict keys, in column order); any other
+# key is left out. Tweets are journaled to CSV while scraping (crash-safe) and
+# the finished file is written as Parquet.
+TWEET_SCHEMA = pa.schema([
+    ('username', pa.dictionary(pa.int32(), pa.string())),
+    ('timestamp', pa.string()),
+    ('content', pa.string()),
+    ('replies', pa.int64()),
+    ('retweets', pa.int64()),
+    ('likes', pa.int64()),
+    ('mentions', pa.string()),
+    ('hashtags', pa.string()),
+    ('urls', pa.string()),
+    ('scraped_at', pa.string()),
+])
+FIELDS = TWEET_SCHEMA.names
+
+# playwright-stealth evasions; the defaults (en-US/Win32, Intel WebGL, 4 cores)
+# match the rest of the fingerprint set up in setup_context
+STEALTH = Stealth()
+
+# Saved sessions older than this need a fresh manual login
+SESSION_MAX_AGE_DAYS = 7
+
+# Hashtags scraped at the same time (one browser context each)
+MAX_CONCURRENT_HASHTAGS = 3
+
+# Incremental runs: stop scrolling after this many consecutive tweets that an
+# earlier run already collected; the manifest keeps the newest ids only
+MANIFEST_STOP_AFTER = 20
+MANIFEST_MAX_IDS = 10_000
+
+# Engagement-count suffixes shown by the web client, and the digit filter
+# used when a metric string is not a plain number
+_METRIC_MULTIPLIERS = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Reports document.body.scrollHeight to Python (the __onScrollHeight binding)
+# only when DOM mutations change it, so the scroll loop's "did new content
+# load" check is a plain attribute read instead of a per-scroll evaluate
+SCROLL_HEIGHT_JS = """
+document.addEventListener('DOMContentLoaded', () => {
+    let last = -1;
+    const report = () => {
+        const height = document.body.scrollHeight;
+        if (height !== last) {
+            last = height;
+            window.__onScrollHeight(height);
+        }
+    };
+    new MutationObserver(report).observe(document.body, { childList: true, subtree: true });
+    report();
+});
+"""
+
+TWEET_ARTICLE_SELECTOR = 'article[data-testid="tweet"]'
+
+# Runs in the page over all TWEET_ARTICLE_SELECTOR matches (locator.evaluate_all):
+# one object per rendered tweet article, with the raw fields the DOM fallback
+# needs (one CDP roundtrip per scroll instead of per tweet).
+# Articles whose status id (from the timestamp's permalink) is in `seen` are
+# skipped before any field is read; ids stay strings (they exceed JS numbers).
+EXTRACT_TWEETS_JS = """
+(els, seen) => {
+    const skip = new Set(seen);
+    const rows = [];
+    for (const el of els) {
+        const permalink = el.querySelector('time')?.closest('a') ?? el.querySelector('a[href*="/status/"]');
+        const match = (permalink?.getAttribute('href') ?? '').match(/\\/status\\/(\\d+)/);
+        const statusId = match ? match[1] : null;
+        if (statusId !== null && skip.has(statusId)) continue;
+        rows.push({
+            status_id: statusId,
+            timestamp: el.querySelector('time')?.dateTime ?? null,
+            content: el.querySelector('div[data-testid="tweetText"]')?.innerText ?? null,
+            replies: el.querySelector('div[data-testid="reply"]')?.textContent ?? '',
+            retweets: el.querySelector('div[data-testid="retweet"]')?.textContent ?? '',
+            likes: el.querySelector('div[data-testid="like"]')?.textContent ?? '',
+            links: [...el.querySelectorAll('a[href]')].map(a => [a.getAttribute('href'), a.textContent.trim()])
+        });
+    }
+    return rows;
+}
+"""
+
+
+def _tweet_from_result(result: Dict) -> Optional[Dict]:
+    """Map one GraphQL `tweet_results.result` object to the scraper's tweet dict"""
+    if result.get('__typename') == 'TweetWithVisibilityResults':
+        result = result.get('tweet', {})
+    legacy = result.get('legacy')
+    if not legacy:
+        return None
+
+    user = result.get('core', {}).get('user_results', {}).get('result', {})
+    username = (user.get('legacy', {}).get('screen_name')
+                or user.get('core', {}).get('screen_name'))
+
+    # Long tweets carry the full text in note_tweet; legacy.full_text is truncated
+    note = result.get('note_tweet', {}).get('note_tweet_results', {}).get('result', {})
+    content = note.get('text') or legacy.get('full_text')
+
+    timestamp = None
+    if legacy.get('created_at'):
+        timestamp = datetime.strptime(legacy['created_at'], '%a %b %d %H:%M:%S %z %Y').isoformat()
+
+    entities = legacy.get('entities', {})
+    if not (username and content):
+        return None
+    return {
+        'username': username,
+        'timestamp': timestamp,
+        'content': content,
+        'replies': legacy.get('reply_count', 0),
+        'retweets': legacy.get('retweet_count', 0),
+        'likes': legacy.get('favorite_count', 0),
+        'mentions': ', '.join('@' + m['screen_name'] for m in entities.get('user_mentions', [])),
+        'hashtags': ', '.join('#' + h['text'] for h in entities.get('hashtags', [])),
+        'urls': ', '.join(u['expanded_url'] for u in entities.get('urls', []) if u.get('expanded_url')),
+        'scraped_at': datetime.now().isoformat()
+    }
+
+
+def write_json(path: str, obj: Dict):
+    """Write `obj` as indented JSON, creating the parent directory"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+
+def write_tweets_parquet(path: str, tweets: List[Dict]) -> pa.Table:
+    """Write the collected tweets as one zstd-compressed Parquet file"""
+    table = pa.Table.from_pylist(tweets, schema=TWEET_SCHEMA)
+    pq.write_table(table, path, compression='zstd')
+    return table
+
+
+def tweet_stats(hashtag: str, table: pa.Table) -> Dict:
+    """Summary statistics, one Arrow kernel per column over the written table"""
+    date_range = pc.min_max(table['timestamp'])  # ISO strings; nulls skipped
+    return {
+        'hashtag': hashtag,
+        'total_tweets': table.num_rows,
+        'unique_users': pc.count_distinct(table['username'].cast(pa.string())).as_py(),
+        'avg_likes': pc.mean(table['likes']).as_py(),
+        'avg_retweets': pc.mean(table['retweets']).as_py(),
+        'avg_replies': pc.mean(table['replies']).as_py(),
+        'date_range': {
+            'start': date_range['min'].as_py(),
+            'end': date_range['max'].as_py()
+        }
+    }
+
+
+def parse_search_timeline(payload: Dict) -> Dict[str, Dict]:
+    """
+    Extract tweets from a SearchTimeline GraphQL response, keyed by rest_id.
+
+    Walks data.search_by_raw_query.search_timeline.timeline.instructions[*]
+    entries (and conversation-module items) down to tweet_results.result.
+    """
+    timeline = (payload.get('data', {}).get('search_by_raw_query', {})
+                .get('search_timeline', {}).get('timeline', {}))
+    tweets = {}
+    for instruction in timeline.get('instructions', []):
+        entries = instruction.get('entries', [])
+        if 'entry' in instruction:
+            entries = entries + [instruction['entry']]
+        for entry in entries:
+            content = entry.get('content', {})
+            item_contents = [content.get('itemContent', {})]
+            item_contents += [i.get('item', {}).get('itemContent', {}) for i in content.get('items', [])]
+            for item in item_contents:
+                result = item.get('tweet_results', {}).get('result')
+                if not result:
+                    continue
+                tweet = _tweet_from_result(result)
+                rest_id = result.get('rest_id') or result.get('tweet', {}).get('rest_id')
+                if tweet and rest_id:
+                    tweets[rest_id] = tweet
+    return tweets
+
+
+def take_new_tweets(timeline: Dict[str, Dict], tweet_ids: Set[int], known_ids: Set[int],
+                    seen_run: int, limit: int) -> Tuple[List[Dict], int, bool]:
+    """
+    Up to `limit` tweets from `timeline` (rest_id -> tweet) not already in
+    `tweet_ids`, which is updated in place. Ids an earlier run collected
+    (`known_ids`, from the manifest) are skipped and counted in `seen_run`;
+    a new tweet resets it. Returns (new tweets, seen_run, caught_up), where
+    caught_up means MANIFEST_STOP_AFTER known tweets came in a row.
+    """
+    tweets = []
+    for rest_id, tweet_data in list(timeline.items()):
+        if len(tweets) >= limit:
+            break
+        status_id = int(rest_id)
+        if status_id in tweet_ids:
+            continue
+        tweet_ids.add(status_id)
+        if status_id in known_ids:
+            seen_run += 1
+            if seen_run >= MANIFEST_STOP_AFTER:
+                return tweets, seen_run, True
+            continue
+        seen_run = 0
+        tweets.append(tweet_data)
+    return tweets, seen_run, False
 
 
 class AdvancedTwitterScraper:
@@ -53,8 +284,23 @@ class AdvancedTwitterScraper:
         self.page = None
         self.context = None
         self.tweets_data = {}
-        self.config_file = 'twitter_session_config.json'
-        self.cookies_file = 'twitter_cookies.pkl'
+        # Playwright storage state of the logged-in session
+        self.config_file = 'twitter_storage_state.json'
+        self.session_loaded = False
+        # Per-hashtag status ids from earlier runs (kept out of the top-level
+        # twitter_data/*.json that ingest picks up)
+        self.manifest_dir = os.path.join('twitter_data', 'manifests')
+        # Ids for the manifest after a scrape; save_data writes them once the Parquet file is saved
+        self.manifest_ids: Optional[Set[int]] = None
+        # Streamed per-hashtag CSV output
+        self.csv_path = None
+        self.csv_file = None
+        self.csv_writer = None
+        self.output_timestamp = None
+        # document.body.scrollHeight, pushed by the page whenever it changes
+        self.scroll_height = 0
+        # In-flight (hashtag, save_data task) pairs; run() waits for them
+        self.pending_saves: List[Tuple[str, asyncio.Task]] = []
         
     def get_random_user_agent(self):
         """Get a random realistic user agent"""
@@ -130,12 +376,20 @@ class AdvancedTwitterScraper:
             chromium_sandbox=False
         )
         
+        # Start from the saved session when there is a recent one
+        storage_state = self.session_state_path()
+        self.session_loaded = storage_state is not None
+        await self.setup_context(storage_state=storage_state)
+        
+    async def setup_context(self, storage_state: Optional[Union[str, Dict]] = None):
+        """Open a fresh browser context + page on self.browser with the anti-detection setup"""
         # Get random configuration
         user_agent = self.get_random_user_agent()
         viewport = self.get_random_viewport()
         
         # Create context with advanced settings
         self.context = await self.browser.new_context(
+            storage_state=storage_state,
             viewport=viewport,
             user_agent=user_agent,
             locale='en-US',
@@ -169,94 +423,29 @@ class AdvancedTwitterScraper:
             }
         )
         
+        # Never inspected: don't download images, video or fonts
+        await self.context.route('**/*', self.block_heavy_requests)
+        
+        # Page -> Python push of the timeline height (see SCROLL_HEIGHT_JS)
+        await self.context.expose_binding('__onScrollHeight', self.on_scroll_height)
+        
+        # Stealth evasions (webdriver, chrome.*, plugins, languages, platform,
+        # permissions, hardwareConcurrency, WebGL vendor) for every page
+        await STEALTH.apply_stealth_async(self.context)
+        
         self.page = await self.context.new_page()
         
-        # Apply stealth mode if available
-        try:
-            from playwright_stealth import stealth_async
-            await stealth_async(self.page)
-        except:
-            pass  # Stealth mode optional
+        # Collect tweets from the timeline's own GraphQL JSON as it streams in
+        self.page.on('response', self.handle_response)
         
-        # Advanced JavaScript injection for anti-detection
+        # Advanced JavaScript injection for anti-detection, on top of the
+        # stealth evasions; only what playwright-stealth doesn't patch
         await self.page.add_init_script("""
-            // Override webdriver detection
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-            
-            // Override chrome detection
-            window.chrome = {
-                runtime: {},
-                loadTimes: function() {},
-                csi: function() {},
-                app: {}
-            };
-            
-            // Override permissions
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Notification.permission }) :
-                    originalQuery(parameters)
-            );
-            
-            // Override plugins
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [
-                    {
-                        name: 'Chrome PDF Plugin',
-                        description: 'Portable Document Format',
-                        filename: 'internal-pdf-viewer',
-                        length: 1
-                    },
-                    {
-                        name: 'Chrome PDF Viewer',
-                        description: 'Portable Document Format',
-                        filename: 'mhjfbmdgcfjbbpaeojofohoefgiehjai',
-                        length: 1
-                    },
-                    {
-                        name: 'Native Client',
-                        description: '',
-                        filename: 'internal-nacl-plugin',
-                        length: 2
-                    }
-                ]
-            });
-            
-            // Override languages
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en']
-            });
-            
-            // Override platform
-            Object.defineProperty(navigator, 'platform', {
-                get: () => 'Win32'
-            });
-            
             // Override memory
             Object.defineProperty(navigator, 'deviceMemory', {
                 get: () => 8
             });
             
-            // Override hardware concurrency
-            Object.defineProperty(navigator, 'hardwareConcurrency', {
-                get: () => 4
-            });
-            
-            // Override WebGL
-            const getParameter = WebGLRenderingContext.prototype.getParameter;
-            WebGLRenderingContext.prototype.getParameter = function(parameter) {
-                if (parameter === 37445) {
-                    return 'Intel Inc.';
-                }
-                if (parameter === 37446) {
-                    return 'Intel Iris OpenGL Engine';
-                }
-                return getParameter.apply(this, arguments);
-            };
-            
             // Override canvas fingerprinting
             const originalToDataURL = HTMLCanvasElement.prototype.toDataURL;
             HTMLCanvasElement.prototype.toDataURL = function(type) {
@@ -274,6 +463,7 @@ class AdvancedTwitterScraper:
             delete window.cdc_adoQpoasnfa76pfcZLmcfl_Promise;
             delete window.cdc_adoQpoasnfa76pfcZLmcfl_Symbol;
         """)
+        await self.page.add_init_script(SCROLL_HEIGHT_JS)
         
         # Set additional CDP properties
         try:
@@ -286,52 +476,78 @@ class AdvancedTwitterScraper:
         except:
             pass
             
-    async def save_cookies(self):
-        """Save cookies to file"""
+    def on_scroll_height(self, source, height: int):
+        self.scroll_height = height
+        
+    async def block_heavy_requests(self, route):
+        """Abort image/media/font requests and the twimg media hosts; continue the rest"""
+        request = route.request
+        if (request.resource_type in BLOCKED_RESOURCE_TYPES
+                or urlparse(request.url).hostname in BLOCKED_HOSTS):
+            await route.abort()
+        else:
+            await route.continue_()
+            
+    async def handle_response(self, response):
+        """Capture tweets from SearchTimeline GraphQL responses into self.tweets_data"""
+        url = response.url
+        if 'graphql' not in url or 'SearchTimeline' not in url:
+            return
         try:
-            cookies = await self.context.cookies()
-            storage_state = await self.context.storage_state()
-            user_agent = await self.page.evaluate("() => navigator.userAgent")  # str
-            config = {
-                'cookies': cookies,
-                'storage_state': storage_state,
-                'user_agent': user_agent,
-                'timestamp': datetime.now().isoformat()
-            }
+            # Decode + walk the (large) timeline JSON on a worker thread so the
+            # event loop keeps servicing the scroll loop and other responses
+            body = await response.body()
+            tweets = await asyncio.to_thread(lambda: parse_search_timeline(orjson.loads(body)))
+        except Exception as e:
+            print(f"\n Error parsing timeline response: {str(e)}")
+            return
+        for rest_id, tweet in tweets.items():
+            self.tweets_data.setdefault(rest_id, tweet)
             
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
-                
-            print("✓ Session saved successfully")
-            return True
+    def manifest_path(self, hashtag: str) -> str:
+        return os.path.join(self.manifest_dir, f"{hashtag}_manifest.json")
+        
+    def load_manifest(self, hashtag: str) -> Set[int]:
+        """Status ids collected for this hashtag by previous runs"""
+        try:
+            with open(self.manifest_path(hashtag), 'rb') as f:
+                return set(orjson.loads(f.read()).get('status_ids', []))
+        except FileNotFoundError:
+            return set()
         except Exception as e:
-            print(f"\n Error saving session: {str(e)}")
-            return False
+            print(f"\n Error loading manifest for #{hashtag}: {str(e)}")
+            return set()
             
-    async def load_cookies(self):
-        """Load cookies from file"""
+    def save_manifest(self, hashtag: str, status_ids: Set[int]):
+        """Persist the newest MANIFEST_MAX_IDS status ids (ids grow over time)"""
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        manifest = {
+            'hashtag': hashtag,
+            'status_ids': sorted(status_ids, reverse=True)[:MANIFEST_MAX_IDS],
+            'updated_at': datetime.now().isoformat()
+        }
+        with open(self.manifest_path(hashtag), 'wb') as f:
+            f.write(orjson.dumps(manifest))
+            
+    def session_state_path(self) -> Optional[str]:
+        """Saved storage state to start contexts from, unless missing or too old"""
+        if not os.path.exists(self.config_file):
+            return None
+        age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(self.config_file))
+        if age.days > SESSION_MAX_AGE_DAYS:
+            print("\n Session too old, manual login required")
+            return None
+        print("✓ Previous session loaded")
+        return self.config_file
+        
+    async def save_session(self):
+        """Save the context's cookies + local storage (Playwright storage state)"""
         try:
-            if not os.path.exists(self.config_file):
-                return False
-                
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-                
-            # Check if session is recent (less than 7 days old)
-            session_time = datetime.fromisoformat(config['timestamp'])
-            if (datetime.now() - session_time).days > 7:
-                print("\n Session too old, manual login required")
-                return False
-                
-            # Load cookies
-            if 'cookies' in config:
-                await self.context.add_cookies(config['cookies'])
-                
-            print("✓ Previous session loaded")
+            await self.context.storage_state(path=self.config_file)
+            print("✓ Session saved successfully")
             return True
-            
         except Exception as e:
-            print(f"\n Error loading session: {str(e)}")
+            print(f"\n Error saving session: {str(e)}")
             return False
             
     async def human_like_typing(self, selector: str, text: str):
@@ -339,28 +555,24 @@ class AdvancedTwitterScraper:
         element = self.page.locator(selector)
         await element.click()
         
-        for char in text:
-            await element.type(char, delay=random.randint(50, 200))
-            
-            # Occasional pauses
-            if random.random() < 0.1:
+        # Occasional pauses (~1 per 10 chars) split the text into chunks;
+        # each chunk is typed by the browser in one call instead of per char
+        cuts = [i for i in range(1, len(text)) if random.random() < 0.1]
+        chunks = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        for n, chunk in enumerate(chunks):
+            if n:
                 await asyncio.sleep(random.uniform(0.5, 1.5))
+            await self.page.keyboard.type(chunk, delay=random.randint(50, 200))
                 
     async def human_like_delay(self, min_seconds: float = 1, max_seconds: float = 3):
-        """Add random human-like delays with micro-movements"""
-        delay = random.uniform(min_seconds, max_seconds)
+        """Add a random human-like delay with an occasional mouse movement"""
+        await asyncio.sleep(random.uniform(min_seconds, max_seconds))
         
-        # Add micro-delays
-        steps = random.randint(3, 7)
-        for _ in range(steps):
-            await asyncio.sleep(delay / steps)
-            
-            # Random micro mouse movements
-            if random.random() < 0.3:
-                await self.page.mouse.move(
-                    random.randint(100, 300),
-                    random.randint(100, 300)
-                )
+        if random.random() < 0.3:
+            await self.page.mouse.move(
+                random.randint(100, 300),
+                random.randint(100, 300)
+            )
                 
     async def random_mouse_movement(self):
         """Simulate realistic mouse movements with curves"""
@@ -420,11 +632,11 @@ class AdvancedTwitterScraper:
         print("LOGIN PROCESS")
         print("="*60)
         
-        # Try to load existing session
-        session_loaded = await self.load_cookies()
-        
-        await self.page.goto('https://twitter.com/home', wait_until='networkidle')
-        await self.human_like_delay(15, 20)
+        # X never goes network-idle (telemetry, live updates); wait for the
+        # timeline itself, which only renders for a logged-in session
+        await self.page.goto('https://twitter.com/home', wait_until='domcontentloaded')
+        await self.wait_for_tweets()
+        await self.human_like_delay(1, 3)
         
         # Check if already logged in
         current_url = self.page.url
@@ -434,10 +646,10 @@ class AdvancedTwitterScraper:
             return True
             
         # Manual login required
-        if not session_loaded:
+        if not self.session_loaded:
             print("\n Manual login required")
             
-        await self.page.goto('https://twitter.com/login', wait_until='networkidle')
+        await self.page.goto('https://twitter.com/login', wait_until='domcontentloaded')
         
         print("\nPlease log in manually in the browser window.")
         print("After successful login, press Enter to continue...")
@@ -451,7 +663,7 @@ class AdvancedTwitterScraper:
             print("✓ Login successful!")
             
             # Save session for future use
-            await self.save_cookies()
+            await self.save_session()
             
             return True
         else:
@@ -460,6 +672,14 @@ class AdvancedTwitterScraper:
             input()
             return True
             
+    async def wait_for_tweets(self, timeout: float = 15000) -> bool:
+        """Wait until the first tweet article renders (False on timeout)"""
+        try:
+            await self.page.locator(TWEET_ARTICLE_SELECTOR).first.wait_for(timeout=timeout)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+            
     async def wait_for_human_intervention(self, message: str):
         """Pause for human intervention"""
         print("\n" + "!"*60)
@@ -513,7 +733,7 @@ class AdvancedTwitterScraper:
             search_url = f"https://twitter.com/search?q=%23{hashtag}&src=typed_query&f=live"
             print(f"\nNavigating to #{hashtag}...")
             
-            await self.page.goto(search_url, wait_until='networkidle', timeout=30000)
+            await self.page.goto(search_url, wait_until='domcontentloaded', timeout=30000)
         else:
             # Use search box
             print(f"\nSearching for #{hashtag} using search box...")
@@ -526,7 +746,8 @@ class AdvancedTwitterScraper:
                 await self.human_like_typing('[data-testid="SearchBox_Search_Input"]', f"#{hashtag}")
                 await self.page.keyboard.press('Enter')
                 
-        await self.human_like_delay(3, 6)
+        await self.wait_for_tweets()
+        await self.human_like_delay(1, 3)
         
         # Check for challenges
         await self.detect_and_handle_challenges()
@@ -543,124 +764,92 @@ class AdvancedTwitterScraper:
                 
         return True
         
-    async def extract_tweet_data(self, tweet_element) -> Optional[Dict]:
-        """Extract data from a single tweet element"""
+    async def extract_page_tweets(self, seen_ids: Set) -> List[Tuple[Optional[int], Dict]]:
+        """
+        Extract every rendered, not yet seen tweet article with a single
+        locator.evaluate_all call, as (status_id or None, tweet dict) pairs
+        """
+        seen = [str(i) for i in seen_ids if isinstance(i, int)]
         try:
-            tweet_html = await tweet_element.inner_html()
-            soup = BeautifulSoup(tweet_html, 'html.parser')
-            
-            # Extract username
-            username = None
-            user_link = soup.find('a', href=re.compile(r'^/[^/]+$'))
-            if user_link:
-                username = user_link.get('href', '').strip('/')
-                
-            # Extract timestamp
-            timestamp = None
-            time_element = soup.find('time')
-            if time_element:
-                timestamp = time_element.get('datetime', '')
-                
-            # Extract tweet content
-            content = None
-            tweet_text = soup.find('div', {'data-testid': 'tweetText'})
-            if tweet_text:
-                content = tweet_text.get_text(strip=True)
-                
-            # Extract engagement metrics
-            metrics = {}
-            
-            # Reply count
-            reply_button = soup.find('div', {'data-testid': 'reply'})
-            if reply_button:
-                reply_text = reply_button.get_text(strip=True)
-                metrics['replies'] = self.parse_metric(reply_text)
-                
-            # Retweet count
-            retweet_button = soup.find('div', {'data-testid': 'retweet'})
-            if retweet_button:
-                retweet_text = retweet_button.get_text(strip=True)
-                metrics['retweets'] = self.parse_metric(retweet_text)
-                
-            # Like count
-            like_button = soup.find('div', {'data-testid': 'like'})
-            if like_button:
-                like_text = like_button.get_text(strip=True)
-                metrics['likes'] = self.parse_metric(like_text)
-                
-            # Extract mentions
-            mentions = []
-            mention_links = soup.find_all('a', href=re.compile(r'^/[^/]+$'))
-            for link in mention_links:
-                text = link.get_text(strip=True)
-                if text.startswith('@'):
-                    mentions.append(text)
-                    
-            # Extract hashtags
-            hashtags = []
-            hashtag_links = soup.find_all('a', href=re.compile(r'/hashtag/'))
-            for link in hashtag_links:
-                hashtags.append(link.get_text(strip=True))
-                
-            # Extract URLs
-            urls = []
-            url_links = soup.find_all('a', href=re.compile(r'^https?://'))
-            for link in url_links:
-                url = link.get('href')
-                if url and 'twitter.com' not in url:
-                    urls.append(url)
-                    
-            if username and content:
-                return {
-                    'username': username,
-                    'timestamp': timestamp,
-                    'content': content,
-                    'replies': metrics.get('replies', 0),
-                    'retweets': metrics.get('retweets', 0),
-                    'likes': metrics.get('likes', 0),
-                    'mentions': ', '.join(mentions),
-                    'hashtags': ', '.join(hashtags),
-                    'urls': ', '.join(urls),
-                    'scraped_at': datetime.now().isoformat()
-                }
-                
+            rows = await self.page.locator(TWEET_ARTICLE_SELECTOR).evaluate_all(EXTRACT_TWEETS_JS, seen)
         except Exception as e:
-            print(f"\n Error extracting tweet data: {str(e)}")
-            
+            print(f"\n Error extracting tweets from page: {str(e)}")
+            return []
+        tweets = []
+        for row in rows:
+            tweet = self.extract_tweet_data(row)
+            if tweet:
+                status_id = row.get('status_id')
+                tweets.append((int(status_id) if status_id else None, tweet))
+        return tweets
+        
+    def extract_tweet_data(self, row: Dict) -> Optional[Dict]:
+        """Build a tweet dict from one article's fields as returned by EXTRACT_TWEETS_JS"""
+        links = row.get('links') or []
+        
+        # Extract username
+        username = None
+        for href, _ in links:
+            if _USER_HREF_RE.match(href):
+                username = href.strip('/')
+                break
+                
+        # Extract URLs (the text only shows them shortened)
+        urls = [href for href, _ in links if _URL_HREF_RE.match(href) and 'twitter.com' not in href]
+        
+        content = row.get('content')
+        if username and content:
+            # Mentions and hashtags straight from the tweet text
+            mentions = ['@' + m for m in _MENTION_RE.findall(content)]
+            hashtags = ['#' + h for h in _HASHTAG_RE.findall(content)]
+            return {
+                'username': username,
+                'timestamp': row.get('timestamp'),
+                'content': content,
+                'replies': self.parse_metric(row.get('replies')),
+                'retweets': self.parse_metric(row.get('retweets')),
+                'likes': self.parse_metric(row.get('likes')),
+                'mentions': ', '.join(mentions),
+                'hashtags': ', '.join(hashtags),
+                'urls': ', '.join(urls),
+                'scraped_at': datetime.now().isoformat()
+            }
         return None
         
     def parse_metric(self, text: str) -> int:
-        """Parse engagement metric from text"""
+        """Parse engagement metric from text ('1,234', '1.2K', '3M')"""
         if not text:
             return 0
             
-        text = text.upper().strip()
-        
-        multipliers = {'K': 1000, 'M': 1000000, 'B': 1000000000}
-        
-        for suffix, multiplier in multipliers.items():
-            if suffix in text:
-                try:
-                    number = float(text.replace(suffix, '').replace(',', ''))
-                    return int(number * multiplier)
-                except:
-                    pass
-                    
-        # Try to extract raw number
-        try:
-            return int(''.join(filter(str.isdigit, text)))
-        except:
+        text = text.strip().upper().replace(',', '')
+        if not text:
             return 0
             
+        multiplier = _METRIC_MULTIPLIERS.get(text[-1])
+        try:
+            return int(float(text[:-1]) * multiplier) if multiplier else int(float(text))
+        except (ValueError, OverflowError):
+            # Stray characters around the number: keep the digits only
+            digits = _NON_DIGIT_RE.sub('', text)
+            return int(digits) if digits else 0
+            
     async def scrape_tweets_for_hashtag(self, hashtag: str, max_tweets: int = 500):
         """Scrape tweets with advanced anti-detection"""
         print(f"\n🔍 Starting to scrape #{hashtag}...")
         
+        # Only this search's timeline responses should feed this hashtag
+        self.tweets_data = {}
+        
         if not await self.search_hashtag(hashtag):
             return []
             
+        self.open_output(hashtag)
         tweets = []
-        tweet_ids = set()  # Track unique tweets
+        tweet_ids = set()  # Track unique tweets by int status id
+        content_keys = set()  # hash((username, content)) for articles without a permalink
+        known_ids = self.load_manifest(hashtag)  # collected by earlier runs
+        seen_run = 0  # consecutive already-known tweets
+        caught_up = False
         last_height = 0
         no_new_tweets_count = 0
         max_scroll_attempts = 60
@@ -674,30 +863,49 @@ class AdvancedTwitterScraper:
             if scroll_attempt % 10 == 0:
                 await self.detect_and_handle_challenges()
                 
-            # Get all tweet elements
-            tweet_elements = await self.page.locator('article[data-testid="tweet"]').all()
-            
-            print(f"Scroll {scroll_attempt + 1}: Found {len(tweet_elements)} elements (Collected: {len(tweets)}/{max_tweets})")
+            # Tweets captured from the GraphQL timeline (deduped by status id)
+            new_tweets, seen_run, caught_up = take_new_tweets(
+                self.tweets_data, tweet_ids, known_ids, seen_run, max_tweets - len(tweets))
+            for tweet_data in new_tweets:
+                tweets.append(tweet_data)
+                self.write_tweet(tweet_data)
+                print(f"✓ Tweet {len(tweets)}: @{tweet_data['username'][:20]}...")
+                
+            # Fall back to DOM scraping only if no timeline JSON was captured
+            dom_tweets = []
+            if not self.tweets_data:
+                dom_tweets = await self.extract_page_tweets(tweet_ids)
+                
+            print(f"Scroll {scroll_attempt + 1}: Timeline {len(self.tweets_data)} tweets, DOM {len(dom_tweets)} tweets (Collected: {len(tweets)}/{max_tweets})")
             
             # Process tweets in random order sometimes
             if random.random() < 0.3:
-                random.shuffle(tweet_elements)
+                random.shuffle(dom_tweets)
                 
-            for element in tweet_elements:
-                if len(tweets) >= max_tweets:
+            for status_id, tweet_data in dom_tweets:
+                if len(tweets) >= max_tweets or caught_up:
                     break
                     
-                tweet_data = await self.extract_tweet_data(element)
-                
                 if tweet_data:
-                    # Create unique ID for deduplication
-                    tweet_id = hashlib.md5(
-                        f"{tweet_data['username']}{tweet_data['content']}".encode()
-                    ).hexdigest()
-                    
-                    if tweet_id not in tweet_ids:
-                        tweet_ids.add(tweet_id)
+                    # Status id when the article links one, else a hash of
+                    # (username, content) so the set does not retain the text
+                    if status_id is None:
+                        key = hash((tweet_data['username'], tweet_data['content']))
+                        if key in content_keys:
+                            continue
+                        content_keys.add(key)
+                    elif status_id in tweet_ids:
+                        continue
+                    else:
+                        tweet_ids.add(status_id)
+                        
+                    if status_id in known_ids:
+                        seen_run += 1
+                        caught_up = seen_run >= MANIFEST_STOP_AFTER
+                    else:
+                        seen_run = 0
                         tweets.append(tweet_data)
+                        self.write_tweet(tweet_data)
                         print(f"✓ Tweet {len(tweets)}: @{tweet_data['username'][:20]}...")
                         
                         # Random micro-delay between extractions
@@ -707,6 +915,10 @@ class AdvancedTwitterScraper:
                 print(f"\nReached target of {max_tweets} tweets")
                 break
                 
+            if caught_up:
+                print(f"\nReached {MANIFEST_STOP_AFTER} tweets in a row from earlier runs. Stopping...")
+                break
+                
             # Human-like scrolling patterns
             scroll_patterns = [
                 lambda: self.random_scrolling(),
@@ -726,7 +938,7 @@ class AdvancedTwitterScraper:
                 await self.human_like_delay(4, 8)
                 
             # Check if new content loaded
-            new_height = await self.page.evaluate("document.body.scrollHeight")
+            new_height = self.scroll_height
             
             if new_height == last_height:
                 no_new_tweets_count += 1
@@ -757,41 +969,98 @@ class AdvancedTwitterScraper:
                 await asyncio.sleep(pause_time)
                 
         print(f"\nCollected {len(tweets)} unique tweets for #{hashtag}")
+        self.manifest_ids = known_ids | tweet_ids
         return tweets
         
+    def open_output(self, hashtag: str):
+        """Start this hashtag's CSV journal; tweets are appended to it as they are collected"""
+        os.makedirs('twitter_data', exist_ok=True)
+        self.output_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.csv_path = f"twitter_data/tweets_{hashtag}_{self.output_timestamp}.csv"
+        self.csv_file = open(self.csv_path, 'w', newline='', encoding='utf-8')
+        self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=FIELDS, extrasaction='ignore')
+        self.csv_writer.writeheader()
+        
+    def write_tweet(self, tweet_data: Dict):
+        """Append one collected tweet to the open CSV (flushed, so a crash keeps it)"""
+        self.csv_writer.writerow(tweet_data)
+        self.csv_file.flush()
+        
+    def close_output(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+            
     async def save_data(self, hashtag: str, tweets: List[Dict]):
-        """Save tweets to multiple formats"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        """
+        Replace the CSV journal with Parquet, then update the manifest and save
+        summary statistics (file I/O off the event loop)
+        """
+        await asyncio.to_thread(self.close_output)
+        timestamp = self.output_timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Create data directory
-        os.makedirs('twitter_data', exist_ok=True)
+        if not tweets:
+            # Header-only file: nothing was collected
+            if self.csv_path and os.path.exists(self.csv_path):
+                await asyncio.to_thread(os.remove, self.csv_path)
+            return
+            
+        parquet_path = os.path.splitext(self.csv_path)[0] + '.parquet'
+        table = await asyncio.to_thread(write_tweets_parquet, parquet_path, tweets)
+        await asyncio.to_thread(os.remove, self.csv_path)
+        print(f"\nSaved Parquet: {parquet_path}")
+        # Only now are the ids safe to mark as collected: a failed write leaves
+        # the manifest as it was, so the next run scrapes these tweets again
+        if self.manifest_ids is not None:
+            await asyncio.to_thread(self.save_manifest, hashtag, self.manifest_ids)
         
-        # Save as CSV
-        if tweets:
-            df = pd.DataFrame(tweets)
-            csv_filename = f"twitter_data/tweets_{hashtag}_{timestamp}.csv"
-            df.to_csv(csv_filename, index=False, encoding='utf-8')
-            print(f"\nSaved CSV: {csv_filename}")
-            
-            # Save summary statistics
-            stats = {
-                'hashtag': hashtag,
-                'total_tweets': len(tweets),
-                'unique_users': df['username'].nunique(),
-                'avg_likes': df['likes'].mean(),
-                'avg_retweets': df['retweets'].mean(),
-                'avg_replies': df['replies'].mean(),
-                'date_range': {
-                    'start': df['timestamp'].min(),
-                    'end': df['timestamp'].max()
-                }
-            }
+        # Save summary statistics
+        stats = tweet_stats(hashtag, table)
+        
+        stats_filename = f"ScrapStatsData/stats_{hashtag}_{timestamp}.json"
+        await asyncio.to_thread(write_json, stats_filename, stats)
+        print(f"\nSaved statistics: {stats_filename}")
+        
+    async def scrape_in_new_context(self, hashtag: str, tweets_per_hashtag: int,
+                                    storage_state: Dict, i: int, total: int) -> List[Dict]:
+        """
+        Scrape one hashtag with its own context/page (and tweets_data); its
+        save runs as a background task (see flush_saves) so the next hashtag
+        can take this concurrency slot while the files are written
+        """
+        worker = AdvancedTwitterScraper()
+        worker.playwright = self.playwright
+        worker.browser = self.browser
+        try:
+            print(f"\n{'='*60}")
+            print(f"Processing #{hashtag} ({i+1}/{total})")
+            print(f"{'='*60}")
             
-            stats_filename = f"ScrapStatsData/stats_{hashtag}_{timestamp}.json"
-            with open(stats_filename, 'w') as f:
-                json.dump(stats, f, indent=2)
-            print(f"\nSaved statistics: {stats_filename}")
+            await worker.setup_context(storage_state=storage_state)
+            await worker.page.goto('https://twitter.com/home', wait_until='domcontentloaded')
+            await worker.wait_for_tweets()
+            await worker.human_like_delay(5, 10)
             
+            tweets = await worker.scrape_tweets_for_hashtag(hashtag, tweets_per_hashtag)
+            self.pending_saves.append((hashtag, asyncio.create_task(worker.save_data(hashtag, tweets))))
+            return tweets
+        except Exception as e:
+            print(f"\nError scraping #{hashtag}: {str(e)}")
+            return []
+        finally:
+            worker.close_output()
+            if worker.context:
+                await worker.context.close()
+                
+    async def flush_saves(self):
+        """Wait for the background save_data tasks, reporting any that failed"""
+        saves, self.pending_saves = self.pending_saves, []
+        results = await asyncio.gather(*(task for _, task in saves), return_exceptions=True)
+        for (hashtag, _), result in zip(saves, results):
+            if isinstance(result, BaseException):
+                print(f"\nError saving #{hashtag}: {str(result)}")
+                
     async def run(self, hashtags: List[str], tweets_per_hashtag: int = 500):
         while True:
             try:
@@ -806,7 +1075,7 @@ class AdvancedTwitterScraper:
                 
                 await self.setup_browser()
                 await self.login_to_twitter()
-                await self.save_cookies()
+                await self.save_session()
                 break
             except KeyboardInterrupt:
                 print("\n Scraping interrupted by user")
@@ -822,39 +1091,49 @@ class AdvancedTwitterScraper:
                 await self.wait_for_human_intervention(f"Unexpected error: {str(e)}")
         
         try:
-            for i, hashtag in enumerate(hashtags):
-                hashtag = hashtag.strip('#')
-                
-                print(f"\n{'='*60}")
-                print(f"Processing #{hashtag} ({i+1}/{len(hashtags)})")
-                print(f"{'='*60}")
-                
-                # Random longer delay at the start of each hashtag
-                if i > 0:
-                    delay = random.uniform(15, 30)
-                    print(f"\nWaiting {delay:.1f} seconds before next hashtag...")
-                    await asyncio.sleep(delay)
-                    
-                    # Sometimes navigate to home between searches
-                    if random.random() < 0.3:
-                        print("\nReturning to home feed briefly...")
-                        await self.page.goto('https://twitter.com/home')
-                        await self.human_like_delay(5, 10)
-                        
-                tweets = await self.scrape_tweets_for_hashtag(hashtag, tweets_per_hashtag)
-                await self.save_data(hashtag, tweets)
+            # Hashtags run concurrently, each in its own context that reuses
+            # the logged-in session, at most MAX_CONCURRENT_HASHTAGS at a time
+            storage_state = await self.context.storage_state()
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_HASHTAGS)
+            hashtags = [h.strip('#') for h in hashtags]
             
+            # Searches start one at a time, 15-30 s apart (random), including
+            # hashtags that were queued for a slot, so they never run in lockstep
+            start_lock = asyncio.Lock()
+            loop = asyncio.get_running_loop()
+            next_start = loop.time()
             
+            async def paced_start(hashtag: str):
+                nonlocal next_start
+                async with start_lock:
+                    delay = next_start - loop.time()
+                    if delay > 0:
+                        print(f"\nWaiting {delay:.1f} seconds before #{hashtag}...")
+                        await asyncio.sleep(delay)
+                    next_start = loop.time() + random.uniform(15, 30)
+                    
+            async def scrape_one(i: int, hashtag: str) -> List[Dict]:
+                async with semaphore:
+                    await paced_start(hashtag)
+                    return await self.scrape_in_new_context(
+                        hashtag, tweets_per_hashtag, storage_state, i, len(hashtags)
+                    )
+                    
+            results = await asyncio.gather(*[scrape_one(i, h) for i, h in enumerate(hashtags)])
+            for hashtag, tweets in zip(hashtags, results):
+                print(f"#{hashtag}: {len(tweets)} tweets")
+                
             print("\nScraping completed successfully!")
             
         except KeyboardInterrupt:
             print("\nScraping interrupted by user")
-            await self.save_cookies()
+            await self.save_session()
         except Exception as e:
             print(f"\nError: {str(e)}")
             await self.wait_for_human_intervention(f"Unexpected error: {str(e)}")
             
         finally:
+            await self.flush_saves()
             if self.browser:
                 print("\nClosing browser...")
                 await self.browser.close()
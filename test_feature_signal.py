@@ -1,8 +1,205 @@
 import pandas as pd
 
+
 def test_load_minimal():
     from features_signals import load_minimal
     # Use a small sample parquet for testing
     df = load_minimal("data_out/tweets_combined.parquet")
     assert not df.empty
-    assert "content" in df.columns
\ No newline at end of file
+    assert "content" in df.columns
+
+
+def test_lexicon_scores():
+    from features_signals import lexicon_scores
+    polarity, urgency, n_tokens = lexicon_scores(["Buy NOW breakout", "", "sell  red\tup"])
+    assert list(n_tokens) == [3, 0, 3]
+    assert polarity[0] == 2 / 3 and polarity[1] == 0.0 and polarity[2] == -1 / 3
+    assert urgency[0] == 1 / 3 and urgency[2] == 0.0
+
+
+def test_bootstrap_ci_groups():
+    import numpy as np
+    from features_signals import bootstrap_ci_groups
+    x = np.array([1.0, 1.0, 1.0, 5.0, 7.0])
+    lo, hi = bootstrap_ci_groups(x, np.array([3, 0, 2]), iters=50)
+    assert lo[0] == hi[0] == 1.0
+    assert np.isnan(lo[1]) and np.isnan(hi[1])
+    assert 5.0 <= lo[2] <= hi[2] <= 7.0
+
+
+def test_aggregate_signals_by_hashtag():
+    from features_signals import aggregate_signals
+    ts = pd.to_datetime(["2024-01-01 00:10", "2024-01-01 00:20", "2024-01-01 01:10", "2024-01-01 00:30"], utc=True)
+    feats = pd.DataFrame({"timestamp": ts, "composite_signal": [1.0, 3.0, 5.0, 7.0],
+                          "hashtag_primary": ["#b", "#a", "#a", ""]})
+    sigs = aggregate_signals(feats, freq="1h", by_hashtag=True)
+    assert list(sigs["hashtag_primary"]) == ["#a", "#a", "#b"]
+    assert list(sigs["signal"]) == [3.0, 5.0, 1.0]
+    assert list(sigs["n"]) == [1, 1, 1]
+
+
+def test_load_json_lines_mixed_types(tmp_path):
+    import json
+    from ingest_clean_store import load_and_standardize_to_arrow
+    rows = [
+        {"username": "a", "timestamp": "2024-01-01T00:10:00Z", "content": "buy #nifty50", "replies": 3},
+        {"username": "b", "timestamp": "2024-01-01T00:20:00Z", "content": "sell @x", "replies": "7"},
+    ]
+    path = tmp_path / "mixed.json"
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    table = load_and_standardize_to_arrow(path)
+    assert table.num_rows == 2
+    assert sorted(table["replies"].to_pylist()) == [3, 7]
+
+
+def _write_signals(path, n=5000, seed=0, hashtags=("#a", "#b c")):
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    rng = np.random.default_rng(seed)
+    signal = rng.normal(size=n)
+    df = pd.DataFrame({
+        "hashtag_primary": rng.choice(list(hashtags), n),
+        "timestamp": pd.to_datetime(rng.integers(1_700_000_000, 1_700_100_000, n), unit="s", utc=True),
+        "signal": signal, "ci_lo": signal - rng.random(n), "ci_hi": signal + rng.random(n),
+    })
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=700)
+    return df
+
+
+def test_stream_downsample_matches_brute_force(tmp_path):
+    import numpy as np
+    from visualize_stream import stream_downsample_by, PLOT_COLUMNS, CI_ENVELOPE
+    path = tmp_path / "signals.parquet"
+    df = _write_signals(path)
+    target = 40
+    for by in (None, "hashtag_primary"):
+        sampled = stream_downsample_by(path, by, PLOT_COLUMNS, target=target, envelope=CI_ENVELOPE)
+        groups = df.groupby(by) if by else [(None, df)]
+        assert sorted(sampled, key=str) == sorted((k for k, _ in groups), key=str)
+        for key, sub in groups:
+            t = sub["timestamp"].astype("int64").to_numpy()
+            nbins = target // 2
+            bins = np.minimum((t - t.min()) / max(t.max() - t.min(), 1) * nbins, nbins - 1).astype(int)
+            expected = sub.assign(b=bins).groupby("b").agg(
+                lo=("signal", "min"), hi=("signal", "max"), ci_lo=("ci_lo", "min"), ci_hi=("ci_hi", "max"))
+            got = sampled[key]
+            got_t = got["timestamp"].astype("int64")
+            got_bins = np.minimum((got_t - t.min()) / max(t.max() - t.min(), 1) * nbins, nbins - 1).astype(int)
+            assert np.all(np.diff(got_t) >= 0)
+            assert set(zip(got_bins, got["signal"])) == (
+                set(zip(expected.index, expected["lo"])) | set(zip(expected.index, expected["hi"])))
+            assert np.array_equal(got["ci_lo"], expected.loc[got_bins, "ci_lo"].to_numpy())
+            assert np.array_equal(got["ci_hi"], expected.loc[got_bins, "ci_hi"].to_numpy())
+
+
+def test_ipc_cache_reused_until_parquet_rewritten(tmp_path, monkeypatch):
+    import os
+    import pyarrow as pa
+    import visualize_stream
+    from visualize_stream import fresh_ipc_cache, plot_signals, PLOT_COLUMNS
+    path = tmp_path / "signals.parquet"
+    cache = tmp_path / "signals.arrow"
+    _write_signals(path, n=100)
+    calls = []
+    stats_time_range = visualize_stream.stats_time_range
+    monkeypatch.setattr(visualize_stream, "stats_time_range", lambda *a: calls.append(a) or stats_time_range(*a))
+
+    plot_signals(path, tmp_path / "p.png", "#a")
+    assert not cache.exists() and fresh_ipc_cache(path, PLOT_COLUMNS) is None
+    plot_signals(path, tmp_path / "p.png", None, arrow_cache=True)
+    assert len(calls) == 1  # the cache miss scanned the Parquet file, using its statistics
+    assert fresh_ipc_cache(path, PLOT_COLUMNS) == cache
+    written = cache.stat().st_mtime_ns
+    plot_signals(path, tmp_path / "p.png", None, arrow_cache=True)
+    assert cache.stat().st_mtime_ns == written and len(calls) == 1
+
+    df = _write_signals(path, n=50, seed=1)
+    earlier = path.stat().st_mtime - 10  # the cache predates the rewrite
+    os.utime(cache, (earlier, earlier))
+    assert fresh_ipc_cache(path, PLOT_COLUMNS) is None
+    plot_signals(path, tmp_path / "p.png", None, arrow_cache=True)
+    assert fresh_ipc_cache(path, PLOT_COLUMNS) == cache
+    with pa.memory_map(str(cache)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert table.column_names == PLOT_COLUMNS + ["hashtag_primary"]
+    assert table["signal"].to_pylist() == df["signal"].tolist()
+
+
+def test_plot_all_signals_one_png_per_hashtag(tmp_path):
+    from visualize_stream import plot_all_signals
+    path = tmp_path / "signals.parquet"
+    _write_signals(path, n=200)
+    written = plot_all_signals(path, tmp_path / "plots")
+    assert sorted(p.name for p in written) == ["a.png", "b_c.png"]
+    assert sorted(p.name for p in (tmp_path / "plots").iterdir()) == ["a.png", "b_c.png"]
+
+    # Hashtags whose file names collide get numbered suffixes instead of overwriting
+    _write_signals(path, n=400, hashtags=("#a.b", "#a_b", "#", "##"))
+    written = plot_all_signals(path, tmp_path / "collide")
+    assert sorted(p.name for p in written) == ["_.png", "__2.png", "a_b.png", "a_b_2.png"]
+    assert len(list((tmp_path / "collide").iterdir())) == 4
+
+
+def _tweet_result(rest_id, screen_name, text, **legacy):
+    return {"rest_id": rest_id, "__typename": "Tweet",
+            "core": {"user_results": {"result": {"legacy": {"screen_name": screen_name}}}},
+            "legacy": {"full_text": text, "created_at": "Mon Jan 01 00:10:00 +0000 2024",
+                       "entities": {"hashtags": [{"text": "nifty50"}], "user_mentions": [], "urls": []},
+                       **legacy}}
+
+
+def test_parse_search_timeline_and_manifest_stop(tmp_path):
+    import pytest
+    pytest.importorskip("playwright")
+    import scraper
+    hidden = {"__typename": "TweetWithVisibilityResults", "tweet": _tweet_result("12", "b", "hidden")}
+    hidden["tweet"].pop("rest_id")
+    hidden["rest_id"] = "12"
+    payload = {"data": {"search_by_raw_query": {"search_timeline": {"timeline": {"instructions": [
+        {"type": "TimelineAddEntries", "entries": [
+            {"content": {"itemContent": {"tweet_results": {"result": _tweet_result("11", "a", "buy #nifty50", favorite_count=5)}}}},
+            {"content": {"itemContent": {"tweet_results": {"result": hidden}}}},
+            {"content": {"items": [{"item": {"itemContent": {"tweet_results": {"result": _tweet_result("13", "c", "sell")}}}}]}},
+            {"content": {"cursorType": "Bottom", "value": "xyz"}},
+        ]},
+        {"type": "TimelineReplaceEntry", "entry": {"content": {"itemContent": {"tweet_results": {"result": {"rest_id": "14"}}}}}},
+    ]}}}}}
+    tweets = scraper.parse_search_timeline(payload)
+    assert list(tweets) == ["11", "12", "13"]
+    assert tweets["11"]["username"] == "a" and tweets["11"]["likes"] == 5
+    assert tweets["11"]["hashtags"] == "#nifty50"
+    assert tweets["11"]["timestamp"] == "2024-01-01T00:10:00+00:00"
+    assert tweets["12"]["content"] == "hidden"
+
+    # An incremental run stops once MANIFEST_STOP_AFTER known tweets come in a row
+    bot = scraper.AdvancedTwitterScraper()
+    bot.manifest_dir = str(tmp_path)
+    stop = scraper.MANIFEST_STOP_AFTER
+    known = list(range(100, 101 + stop))
+    bot.save_manifest("nifty50", set(known))
+    known_ids = bot.load_manifest("nifty50")
+    assert known_ids == set(known)
+    timeline = {str(i): tweets["11"] for i in [1, known[0], 2] + known[1:stop]}
+    tweet_ids = set()
+    new, seen_run, caught_up = scraper.take_new_tweets(timeline, tweet_ids, known_ids, 0, limit=50)
+    assert len(new) == 2 and not caught_up and seen_run == stop - 1
+    new, seen_run, caught_up = scraper.take_new_tweets({str(known[stop]): {}, "5": {}}, tweet_ids, known_ids,
+                                                       seen_run, limit=50)
+    assert new == [] and caught_up
+
+
+def test_plot_one_hashtag_from_multi_batch_file(tmp_path):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from visualize_stream import plot_signals, stream_downsample, PLOT_COLUMNS
+    path = tmp_path / "signals.parquet"
+    df = _write_signals(path, n=10_000).sort_values(["hashtag_primary", "timestamp"])
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), path, row_group_size=1000)
+    sampled = stream_downsample(path, PLOT_COLUMNS, filters=ds.field("hashtag_primary") == "#b c", target=40)
+    assert 0 < len(sampled["signal"]) <= 40
+    for run in range(2):  # the second run reads the Arrow cache
+        out_png = tmp_path / f"b{run}.png"
+        plot_signals(path, out_png, "#a", arrow_cache=True)
+        assert out_png.stat().st_size > 0
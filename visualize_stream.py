@@ -5,20 +5,32 @@ visualize_stream.py
 
 Memory-aware plotting for large time-series signals. Uses matplotlib only.
 
-- Downsamples to a target number of points when needed (evenly spaced).
-- Streams from Parquet in chunks (via row-group iteration) if present.
+- Downsamples to a target number of points, keeping each time bucket's min
+  and max so spikes stay visible.
+- Streams only the plotted columns from Parquet, one row group at a time,
+  folding each into the downsampled buffer (memory O(batch + target));
+  a hashtag filter is pushed down so row groups whose statistics exclude it
+  are skipped.
+- With --arrow_cache, also writes the plotted columns to a sibling Arrow IPC
+  file (signals.arrow); later plots scan it memory-mapped while it is newer
+  than the Parquet file, instead of decoding Parquet again.
 """
 
 from __future__ import annotations
 import argparse
 import logging
+import re
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 
 def setup_logging(verbosity: int) -> None:
@@ -32,50 +44,352 @@ def setup_logging(verbosity: int) -> None:
 
 logger = logging.getLogger("viz")
 
+# Rows per streamed batch, and batches decoded ahead of the one being
+# downsampled: together they bound the scan's memory regardless of file size
+BATCH_ROWS = 65_536
+BATCH_READAHEAD = 8
+# Coalesce each row group's column-chunk reads into few large ranges issued
+# ahead of decode (Arrow's default for datasets, pinned here since the scan
+# projects a handful of columns whose chunks are scattered through the file)
+PARQUET_FORMAT = ds.ParquetFileFormat(
+    default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True, cache_options=pa.CacheOptions(lazy=True))
+)
 
-def read_parquet_all(path: Path) -> pd.DataFrame:
-    # Efficient read via pyarrow row-group iteration to keep memory stable
-    table = pq.ParquetFile(path)
-    frames = []
-    for i in range(table.num_row_groups):
-        rg = table.read_row_group(i)
-        frames.append(rg.to_pandas())
-    if frames:
-        return pd.concat(frames, ignore_index=True)
-    return pd.DataFrame()
 
+def iter_row_groups(path: Path, columns: Optional[List[str]] = None,
+                    filters: Optional[ds.Expression] = None) -> Iterator[pa.RecordBatch]:
+    # Column projection + predicate pushdown: only the requested columns are
+    # decoded, and row groups whose min/max statistics rule out `filters` are
+    # never read. Batches (at most BATCH_ROWS rows) are yielded one at a time,
+    # in file order, while Arrow's thread pool decodes the row groups ahead
+    # of them in parallel (the GIL is released during decompression/decode).
+    # An Arrow IPC cache (see write_ipc_cache) is memory-mapped and needs no decode.
+    if path.suffix == ".arrow":
+        dataset = ds.dataset(path, format="ipc", filesystem=pafs.LocalFileSystem(use_mmap=True))
+    else:
+        dataset = ds.dataset(path, format=PARQUET_FORMAT)
+    yield from dataset.to_batches(columns=columns, filter=filters, batch_size=BATCH_ROWS,
+                                  use_threads=True, batch_readahead=BATCH_READAHEAD)
+
+
+def column_numpy(batch: pa.RecordBatch, name: str) -> np.ndarray:
+    """
+    Timestamps (which must be non-null) as int64 ns, numbers as float
+    (nulls -> NaN). Null-free timestamp[ns] / float64 columns (what
+    features_signals.py writes) are zero-copy views of the batch buffers.
+    """
+    col = batch.column(name)
+    if pa.types.is_timestamp(col.type):
+        if col.type.unit != "ns":
+            col = col.cast(pa.timestamp("ns", col.type.tz))
+        return col.view(pa.int64()).to_numpy()
+    if col.type != pa.float64():
+        col = col.cast(pa.float64())
+    return col.to_numpy(zero_copy_only=col.null_count == 0)
+
+
+def stats_time_range(path: Path, time: str) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (min, max) of `time` in int64 ns from Parquet row-group statistics, with no
+    data decoded; (None, None) if any row group lacks them (or there are none).
+    """
+    lo = hi = None
+    to_ns = pa.timestamp("ns", "UTC")
+    for fragment in ds.dataset(path, format=PARQUET_FORMAT).get_fragments():
+        for row_group in fragment.row_groups:
+            stats = (row_group.statistics or {}).get(time)
+            if not stats or stats.get("min") is None:
+                if row_group.num_rows:
+                    return None, None
+                continue
+            bounds = pa.array([stats["min"], stats["max"]]).cast(to_ns).view(pa.int64()).to_pylist()
+            lo = bounds[0] if lo is None else min(lo, bounds[0])
+            hi = bounds[1] if hi is None else max(hi, bounds[1])
+    return lo, hi
+
+
+def bin_first(bins: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Row of the smallest key in each bin present"""
+    if not len(bins):
+        return np.empty(0, dtype=np.intp)
+    order = np.lexsort((keys, bins))
+    sorted_bins = bins[order]
+    return order[np.r_[0, np.flatnonzero(sorted_bins[1:] != sorted_bins[:-1]) + 1]]
+
+
+def fresh_ipc_cache(signals_path: Path, columns: List[str]) -> Optional[Path]:
+    """
+    Sibling `.arrow` (Arrow IPC file) of `signals_path`, if it is newer than
+    the Parquet file and has `columns`; else None (scan the Parquet).
+    """
+    cache = signals_path.with_suffix(".arrow")
+    try:
+        if cache.exists() and cache.stat().st_mtime >= signals_path.stat().st_mtime:
+            with pa.memory_map(str(cache)) as source:
+                if set(columns) <= set(pa.ipc.open_file(source).schema.names):
+                    return cache
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning("Arrow cache %s unusable, reading Parquet: %s", cache, e)
+    return None
+
+
+def write_ipc_cache(signals_path: Path, columns: List[str]) -> Optional[Path]:
+    """
+    (Re)write the sibling `.arrow` with `columns` of `signals_path`, streaming
+    the Parquet batches into it so memory stays one batch. The IPC file has
+    no row-group statistics: a cached --hashtag plot filters row by row, but
+    nothing is decompressed. Returns None if it cannot be written.
+    """
+    cache = signals_path.with_suffix(".arrow")
+    try:
+        schema = pq.read_schema(signals_path)
+        schema = pa.schema([schema.field(c) for c in columns])
+        tmp = cache.with_suffix(".arrow.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in iter_row_groups(signals_path, columns):
+                writer.write_batch(batch)
+        tmp.replace(cache)
+    except (OSError, pa.ArrowInvalid) as e:
+        logger.warning("Could not write Arrow cache %s: %s", cache, e)
+        return None
+    logger.info("Wrote Arrow cache %s", cache)
+    return cache
+
+
+def scan_time_ranges(path: Path, time: str, by: Optional[str] = None,
+                     filters: Optional[ds.Expression] = None) -> Dict[Optional[str], Tuple[int, int]]:
+    """(min, max) of `time` in int64 ns per value of `by` (under the key None without `by`), in one scan"""
+    ranges: Dict[Optional[str], Tuple[int, int]] = {}
+    for batch in iter_row_groups(path, [time] + ([by] if by else []), filters):
+        if not batch.num_rows:
+            continue
+        if by is None:
+            ts = column_numpy(batch, time)
+            keys, los, his = [None], [ts.min()], [ts.max()]
+        else:
+            agg = pa.Table.from_batches([batch]).group_by(by).aggregate([(time, "min"), (time, "max")])
+            agg = agg.combine_chunks().to_batches()[0]
+            keys = agg.column(by).cast(pa.string()).to_pylist()
+            los, his = column_numpy(agg, f"{time}_min"), column_numpy(agg, f"{time}_max")
+        for key, lo, hi in zip(keys, los, his):
+            if key in ranges:
+                lo, hi = min(lo, ranges[key][0]), max(hi, ranges[key][1])
+            ranges[key] = (int(lo), int(hi))
+    return ranges
+
+
+def stream_downsample_by(path: Path, by: Optional[str], columns: List[str], filters: Optional[ds.Expression] = None,
+                         target: int = 1000, value: str = "signal", time: str = "timestamp",
+                         envelope: Optional[Dict[str, np.ufunc]] = None) -> Dict[Optional[str], Dict[str, np.ndarray]]:
+    """
+    stream_downsample for every value of the `by` column in the same two
+    scans (keyed by value; rows where it is null are dropped), each with its
+    own time range and `target` points. `by=None` downsamples the whole file
+    under the key None.
+    """
+    valid = ds.field(time).is_valid()
+    if by:
+        valid = valid & ds.field(by).is_valid()
+    # Unfiltered, the range is in the Parquet footer's row-group statistics already
+    unfiltered_parquet = by is None and filters is None and path.suffix != ".arrow"
+    t_lo, t_hi = stats_time_range(path, time) if unfiltered_parquet else (None, None)
+    filters = valid if filters is None else filters & valid
+    if t_lo is not None:
+        ranges = {None: (t_lo, t_hi)}
+    else:
+        ranges = scan_time_ranges(path, time, by, filters)
+    if not ranges:
+        return {}
+
+    keys = sorted(ranges) if by else [None]
+    t0 = np.array([ranges[k][0] for k in keys], dtype=np.int64)
+    span = np.array([max(ranges[k][1] - ranges[k][0], 1) for k in keys], dtype=np.int64)
+    value_set = pa.array(keys, type=pa.string()) if by else None
+    # Each group owns nbins consecutive buckets: bucket = group * nbins + time bucket
+    nbins = max(target // 2, 1)
+    total = len(keys) * nbins
+    sides = ("lo", "hi")
+    best = {side: np.full(total, np.inf) for side in sides}
+    filled = {side: np.zeros(total, dtype=bool) for side in sides}
+    rows = {side: {c: np.empty(total, dtype=np.int64 if c == time else float) for c in columns} for side in sides}
+    # Position of each kept row in the scan, to drop rows kept by both sides
+    row_ids = {side: np.empty(total, dtype=np.int64) for side in sides}
+    envelope = envelope or {}
+    env = {c: np.full(total, np.nan) for c in envelope}
+    offset = 0
+    for batch in iter_row_groups(path, columns + ([by] if by and by not in columns else []), filters):
+        if not batch.num_rows:  # filtered scans yield empty batches
+            continue
+        cols = {c: column_numpy(batch, c) for c in columns}
+        g = 0 if by is None else pc.index_in(batch.column(by).cast(pa.string()), value_set=value_set).to_numpy()
+        bins = np.minimum(((cols[time] - t0[g]) / span[g] * nbins).astype(np.int64), nbins - 1) + g * nbins
+        for c, reduce in envelope.items():
+            reduce.at(env[c], bins, cols[c])
+        y = cols[value]
+        nan = np.isnan(y)
+        # Both sides keep the smallest key: y for the min, -y for the max
+        for side, key in (("lo", np.where(nan, np.inf, y)), ("hi", np.where(nan, np.inf, -y))):
+            pick = bin_first(bins, key)
+            b = bins[pick]
+            better = ~filled[side][b] | (key[pick] < best[side][b])
+            b, pick = b[better], pick[better]
+            best[side][b] = key[pick]
+            filled[side][b] = True
+            row_ids[side][b] = offset + pick
+            for c in columns:
+                rows[side][c][b] = cols[c][pick]
+        offset += batch.num_rows
+
+    ids = np.concatenate([row_ids[side][filled[side]] for side in sides])
+    out = {c: np.concatenate([rows[side][c][filled[side]] for side in sides]) for c in columns}
+    kept_bins = np.concatenate([np.flatnonzero(filled[side]) for side in sides])
+    _, first = np.unique(ids, return_index=True)
+    # Sorted by group, then time (lexsort is stable, so ties keep scan order)
+    order = first[np.lexsort((out[time][first], kept_bins[first] // nbins))]
+    out = {c: arr.take(order) for c, arr in out.items()}
+    kept_bins = kept_bins.take(order)
+    for c in envelope:
+        out[c] = env[c].take(kept_bins)
+    out[time] = out[time].view("datetime64[ns]")
+    ends = np.cumsum(np.bincount(kept_bins // nbins, minlength=len(keys)))
+    starts = ends - np.bincount(kept_bins // nbins, minlength=len(keys))
+    return {k: {c: arr[lo:hi] for c, arr in out.items()}
+            for k, lo, hi in zip(keys, starts, ends) if hi > lo}
+
+
+def stream_downsample(path: Path, columns: List[str], filters: Optional[ds.Expression] = None,
+                      target: int = 1000, value: str = "signal", time: str = "timestamp",
+                      envelope: Optional[Dict[str, np.ufunc]] = None) -> Dict[str, np.ndarray]:
+    """
+    Min/max bucket downsampling (M4-style) streamed over the row groups.
 
-def downsample(df: pd.DataFrame, target: int = 1000) -> pd.DataFrame:
-    if len(df) <= target:
-        return df
-    idx = np.linspace(0, len(df)-1, target, dtype=int)
-    return df.iloc[idx]
+    A first pass reads only `time` for the range; `target // 2` equal time
+    buckets then keep the rows with the smallest and largest `value` seen so
+    far, so memory is one batch plus `target` rows and the input need not
+    be sorted. Spikes survive, unlike evenly spaced samples. NaN values (empty
+    aggregation buckets) are kept only when a whole bucket is NaN.
 
+    `envelope` maps columns to a reduction over their bucket instead of the
+    kept rows' values, e.g. {"ci_lo": np.fmin, "ci_hi": np.fmax} so the CI
+    band drawn is the widest in each bucket rather than the one beside the
+    extreme `value` (fmin/fmax skip NaN).
 
-def plot_signals(signals_path: Path, out_png: Optional[Path], hashtag: Optional[str]) -> None:
-    df = read_parquet_all(signals_path)
-    if df.empty:
+    Returns time-sorted NumPy arrays per column (`time` as datetime64[ns], UTC),
+    ready to hand to matplotlib without a DataFrame in between.
+    """
+    sampled = stream_downsample_by(path, None, columns, filters, target, value, time, envelope)
+    if None not in sampled:
+        return {c: np.empty(0, dtype="datetime64[ns]" if c == time else float) for c in columns}
+    return sampled[None]
+
+
+def new_figure() -> Figure:
+    """Off-screen figure on an Agg canvas (no pyplot), reusable across plot_signals calls"""
+    fig = Figure(layout="constrained")
+    FigureCanvasAgg(fig)
+    return fig
+
+
+PLOT_COLUMNS = ["timestamp", "signal", "ci_lo", "ci_hi"]
+# Widest CI per bucket rather than the band beside the kept signal extremes
+CI_ENVELOPE = {"ci_lo": np.fmin, "ci_hi": np.fmax}
+
+
+def draw_signal(ax, sampled: Dict[str, np.ndarray], hashtag: Optional[str]) -> None:
+    ax.plot(sampled["timestamp"], sampled["signal"], label="signal")
+    ax.fill_between(sampled["timestamp"], sampled["ci_lo"], sampled["ci_hi"], alpha=0.2, label="95% CI")
+    ax.set_xlabel("time")
+    ax.set_ylabel("composite signal")
+    ax.set_title(f"Composite signal over time{f' — {hashtag}' if hashtag else ''}")
+    ax.legend()
+
+
+def save_figure(fig: Figure, sampled: Dict[str, np.ndarray], hashtag: Optional[str], out_png: Path) -> None:
+    """Redraw `fig`'s (first) axes with `sampled` and save it as `out_png`"""
+    ax = fig.axes[0] if fig.axes else fig.subplots()
+    ax.clear()
+    draw_signal(ax, sampled, hashtag)
+    fig.savefig(out_png, dpi=150)
+
+
+def plot_signals(signals_path: Path, out_png: Optional[Path], hashtag: Optional[str],
+                 fig: Optional[Figure] = None, arrow_cache: bool = False) -> None:
+    """
+    Plot the (downsampled) signal with its CI band to `out_png`, or show it.
+
+    A fresh sibling `.arrow` cache is read instead of the Parquet file; with
+    `arrow_cache`, a missing or stale one is written after the Parquet scan.
+
+    Pass the same `fig` (from new_figure) when plotting many hashtags to PNGs:
+    its axes are cleared and redrawn instead of building a new figure each time.
+    """
+    filters = None
+    per_hashtag = "hashtag_primary" in pq.read_schema(signals_path).names
+    if hashtag:
+        if not per_hashtag:
+            logger.error("No hashtag_primary column in %s (run features_signals.py --by_hashtag)", signals_path)
+            return
+        filters = ds.field("hashtag_primary") == hashtag
+    elif per_hashtag:
+        logger.warning("%s has per-hashtag signals; pass --hashtag to plot one of them", signals_path)
+    cache_columns = PLOT_COLUMNS + ["hashtag_primary"] * per_hashtag
+    cached = fresh_ipc_cache(signals_path, cache_columns)
+    sampled = stream_downsample(cached or signals_path, PLOT_COLUMNS, filters=filters, target=1500,
+                                envelope=CI_ENVELOPE)
+    if arrow_cache and not cached:
+        write_ipc_cache(signals_path, cache_columns)
+    if not len(sampled["timestamp"]):
         logger.warning("Empty signals file: %s", signals_path)
         return
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-    if hashtag:
-        df = df[df["hashtag_primary"] == hashtag]
-    df = df.sort_values("timestamp")
-    df_ds = downsample(df[["timestamp","signal","ci_lo","ci_hi"]], target=1500)
-
-    plt.figure()
-    plt.plot(df_ds["timestamp"], df_ds["signal"], label="signal")
-    plt.fill_between(df_ds["timestamp"], df_ds["ci_lo"], df_ds["ci_hi"], alpha=0.2, label="95% CI")
-    plt.xlabel("time")
-    plt.ylabel("composite signal")
-    plt.title(f"Composite signal over time{f' — {hashtag}' if hashtag else ''}")
-    plt.legend()
-    plt.tight_layout()
+
     if out_png:
-        plt.savefig(out_png, dpi=150)
+        save_figure(fig or new_figure(), sampled, hashtag, out_png)
     else:
+        import matplotlib.pyplot as plt  # interactive backend only when showing
+        fig, ax = plt.subplots(layout="constrained")
+        draw_signal(ax, sampled, hashtag)
         plt.show()
-    plt.close()
+        plt.close(fig)
+
+
+def plot_all_signals(signals_path: Path, out_dir: Path, arrow_cache: bool = False) -> List[Path]:
+    """
+    One PNG per hashtag of a --by_hashtag signals file, written to
+    `out_dir/<hashtag>.png`. All hashtags are downsampled in the same scans
+    and drawn on one reused figure, instead of a filtered scan per hashtag.
+    The `.arrow` cache is used as in plot_signals.
+    """
+    if "hashtag_primary" not in pq.read_schema(signals_path).names:
+        logger.error("No hashtag_primary column in %s (run features_signals.py --by_hashtag)", signals_path)
+        return []
+    cache_columns = PLOT_COLUMNS + ["hashtag_primary"]
+    cached = fresh_ipc_cache(signals_path, cache_columns)
+    sampled = stream_downsample_by(cached or signals_path, "hashtag_primary", PLOT_COLUMNS, target=1500,
+                                   envelope=CI_ENVELOPE)
+    if arrow_cache and not cached:
+        write_ipc_cache(signals_path, cache_columns)
+    if not sampled:
+        logger.warning("Empty signals file: %s", signals_path)
+        return []
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fig = new_figure()
+    written = []
+    used = set()  # lowercased, for case-insensitive filesystems
+    for hashtag, series in sampled.items():
+        base = name = re.sub(r"[^\w-]+", "_", hashtag.lstrip("#")) or "_"
+        n = 1
+        while name.lower() in used:  # e.g. "#a.b" and "#a_b"
+            n += 1
+            name = f"{base}_{n}"
+        if n > 1:
+            logger.warning("Plot for %s written as %s.png (name taken by another hashtag)", hashtag, name)
+        used.add(name.lower())
+        out_png = out_dir / f"{name}.png"
+        save_figure(fig, series, hashtag, out_png)
+        written.append(out_png)
+    logger.info("Wrote %d hashtag plots -> %s", len(written), out_dir)
+    return written
 
 
 def main():
@@ -83,11 +397,18 @@ def main():
     ap.add_argument("--signals", type=Path, required=True, help="Path to signals.parquet")
     ap.add_argument("--out", type=Path, default=None, help="Optional output PNG file")
     ap.add_argument("--hashtag", type=str, default=None, help="Filter to a specific hashtag (e.g., #nifty50)")
+    ap.add_argument("--out_dir", type=Path, default=None,
+                    help="Write one PNG per hashtag into this directory (signals from --by_hashtag)")
+    ap.add_argument("--arrow_cache", action="store_true",
+                    help="Also write the plotted columns to a sibling .arrow file; later plots read it while fresh")
     ap.add_argument("-v", "--verbose", action="count", default=0)
     args = ap.parse_args()
 
     setup_logging(args.verbose)
-    plot_signals(args.signals, args.out, args.hashtag)
+    if args.out_dir:
+        plot_all_signals(args.signals, args.out_dir, arrow_cache=args.arrow_cache)
+    else:
+        plot_signals(args.signals, args.out, args.hashtag, arrow_cache=args.arrow_cache)
 
 if __name__ == "__main__":
     raise SystemExit(main())